@@ -1,101 +1,233 @@
 import os
+import io
+import json
+import time
+import functools
 import logging
-from flask import Flask, render_template, request, jsonify
+import click
+from flask import Flask, Request, g, render_template, request, jsonify, url_for, Response, stream_with_context
+from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from config import UPLOAD_FOLDER
+from config import (
+    MAX_CONTENT_LENGTH, INGEST_UPSERT_BATCH_SIZE, INGEST_PARALLEL, RESPONSE_CACHE_ENABLED,
+    KNOWLEDGE_SEARCH_TIMEOUT, WEB_SEARCH_TIMEOUT, HYBRID_SEARCH_DEFAULT,
+    CRAWL_CONCURRENCY, CRAWL_HOST_INTERVAL, CRAWL_EXTRACT_WORKERS, LOG_LEVEL, METRICS_ENABLED
+)
 from qdrant_service import QdrantService
 from utils.extractors import (
     extract_text_from_file, extract_text_from_pdf, 
     extract_text_from_youtube, extract_text_from_audio,
-    extract_text_from_image, extract_text_from_website
+    extract_text_from_image, extract_text_from_website,
+    EXTRACTOR_VERSIONS, is_extraction_failure
 )
+from utils.extraction_cache import extraction_key, get_extraction_cache
+from utils.crawl import ingest_urls
+from utils.pdf import extract_pdf_text
 from utils.search import search_web
-from utils.ai import generate_ai_response
+from utils.ai import generate_ai_response, build_chat_prompt, stream_ai_response
+from utils.response_cache import SemanticResponseCache
+from utils.retrieval import fan_out
+from utils.jobs import JobQueue
+from utils.metrics import REQUEST_SECONDS, span, collect_timings, render_metrics
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging for the app and every module it uses
+logging.basicConfig(level=LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+class InMemoryUploadRequest(Request):
+    """
+    Request that keeps uploaded files in memory rather than spooling them to
+    temporary files; MAX_CONTENT_LENGTH bounds the size of each request.
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
 # Setup Flask app
 app = Flask(__name__)
+app.request_class = InMemoryUploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 app.secret_key = os.environ.get("SESSION_SECRET", "development-secret-key")
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# Configure upload folder to use /tmp in read-only file systems
-app.config['UPLOAD_FOLDER'] = '/tmp/uploads'  # Change to /tmp
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
 # Initialize Qdrant client
 qdrant_client = QdrantService()
 
+# Semantic cache of chat responses, invalidated by the collection revision
+response_cache = SemanticResponseCache() if RESPONSE_CACHE_ENABLED else None
+
+# Persistent cache of extracted text, so repeated sources skip fetching and transcription
+extraction_cache = get_extraction_cache()
+
+# Background jobs for slow extraction and storage work
+job_queue = JobQueue()
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method, endpoint=request.endpoint or 'unmatched', status=response.status_code
+        )
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Expose request and stage latency histograms in the Prometheus text format."""
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Not found"}), 404
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/')
 def index():
     """Render the main application page."""
     return render_template('index.html')
 
+# Extractors by source type, split by whether they read an uploaded file or a URL
+FILE_EXTRACTORS = {
+    'text': extract_text_from_file,
+    'pdf': extract_text_from_pdf,
+    'audio': extract_text_from_audio,
+    'image': extract_text_from_image,
+}
+URL_EXTRACTORS = {
+    'youtube': extract_text_from_youtube,
+    'website': extract_text_from_website,
+}
+
+def is_truthy(value):
+    """Interpret a form or JSON flag value as a boolean."""
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+def job_accepted(job_id):
+    """Build the 202 response returned when work is handed to the job queue."""
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for('get_job', job_id=job_id)
+    }), 202
+
+def lookup_extraction(source_type, source):
+    """
+    Look up a source in the extraction cache.
+
+    Returns:
+        tuple: (cache_key, content); cache_key is None when the source type is
+        not cached, and content is None on a cache miss
+    """
+    version = EXTRACTOR_VERSIONS.get(source_type)
+    if extraction_cache is None or version is None:
+        return None, None
+    try:
+        cache_key = extraction_key(source_type, source, version)
+        return cache_key, extraction_cache.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Error reading extraction cache: {str(e)}")
+        return None, None
+
+def extract_and_cache(extractor, cache_key, source):
+    """Run an extractor and cache its result, unless the result is an error message."""
+    content = extractor(source)
+    if not is_extraction_failure(content):
+        try:
+            extraction_cache.set(cache_key, content)
+        except Exception as e:
+            logger.warning(f"Error writing extraction cache: {str(e)}")
+    return content
+
+def run_extraction_job(report_progress, extractor, source):
+    """Background job: extract content from an uploaded file or URL."""
+    report_progress(0.1, "Extracting content")
+    return {"content": extractor(source)}
+
+def run_store_job(report_progress, document_data):
+    """Background job: store a document in the Qdrant collection."""
+    return {"id": qdrant_client.add_document(document_data, progress=report_progress)}
+
+def run_url_ingest_job(report_progress, urls):
+    """Background job: fetch, extract and store a batch of URLs."""
+    return ingest_urls(urls, qdrant_client, cache=extraction_cache, progress=report_progress)
+
 @app.route('/api/extract-content', methods=['POST'])
 def extract_content():
-    """Extract content from various sources."""
+    """
+    Extract content from various sources.
+    
+    With async=true the extraction runs as a background job and the response
+    is a job ID to poll at /api/jobs/<job_id>. Cached results are returned
+    directly, with "cached": true, even for async requests.
+    """
     try:
         source_type = request.form.get('source_type')
-        content = ""
 
-        if source_type == 'text':
+        if source_type in FILE_EXTRACTORS:
             if 'file' not in request.files:
                 return jsonify({"error": "No file provided"}), 400
-            file = request.files['file']
-            content = extract_text_from_file(file)
+            source = request.files['file']
+            extractor = FILE_EXTRACTORS[source_type]
         
-        elif source_type == 'pdf':
-            if 'file' not in request.files:
-                return jsonify({"error": "No file provided"}), 400
-            file = request.files['file']
-            content = extract_text_from_pdf(file)
-        
-        elif source_type == 'youtube':
-            url = request.form.get('url')
-            if not url:
+        elif source_type in URL_EXTRACTORS:
+            source = request.form.get('url')
+            if not source:
                 return jsonify({"error": "No URL provided"}), 400
-            content = extract_text_from_youtube(url)
-        
-        elif source_type == 'audio':
-            if 'file' not in request.files:
-                return jsonify({"error": "No file provided"}), 400
-            file = request.files['file']
-            content = extract_text_from_audio(file)
-        
-        elif source_type == 'image':
-            if 'file' not in request.files:
-                return jsonify({"error": "No file provided"}), 400
-            file = request.files['file']
-            content = extract_text_from_image(file)
-        
-        elif source_type == 'website':
-            url = request.form.get('url')
-            if not url:
-                return jsonify({"error": "No URL provided"}), 400
-            content = extract_text_from_website(url)
+            extractor = URL_EXTRACTORS[source_type]
         
         else:
             return jsonify({"error": "Invalid source type"}), 400
 
+        extractor = span(f"extract_{source_type}")(extractor)
+        
+        # Serve repeated sources from the cache before any network or model call
+        cache_key, content = lookup_extraction(source_type, source)
+        if content is not None:
+            return jsonify({"content": content, "cached": True})
+        if cache_key is not None:
+            extractor = functools.partial(extract_and_cache, extractor, cache_key)
+
+        if is_truthy(request.form.get('async')):
+            if source_type in FILE_EXTRACTORS:
+                # Werkzeug closes the request's uploads when the request ends, so hand the
+                # in-memory stream to the worker and leave an empty one in its place
+                stream, source.stream = source.stream, io.BytesIO()
+                source = FileStorage(
+                    stream=stream,
+                    filename=source.filename,
+                    content_type=source.content_type
+                )
+            return job_accepted(job_queue.submit('extract', run_extraction_job, extractor, source))
+
+        content = extractor(source)
         return jsonify({"content": content})
     
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         logger.error(f"Error extracting content: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/store-document', methods=['POST'])
 def store_document():
-    """Store a document in the Qdrant collection."""
+    """
+    Store a document in the Qdrant collection.
+    
+    With "async": true the document is stored by a background job and the
+    response is a job ID to poll at /api/jobs/<job_id>.
+    """
     try:
         data = request.json
         if not data or 'text' not in data:
             return jsonify({"error": "No text provided"}), 400
         
         metadata = {
-            'title': data.get('title', 'Untitled Document'),
+            'title': data.get('title') or '',
             'source_type': data.get('source_type', 'manual'),
             'source': data.get('source', 'User input')
         }
@@ -105,6 +237,9 @@ def store_document():
             **metadata
         }
         
+        if is_truthy(data.get('async')):
+            return job_accepted(job_queue.submit('store', run_store_job, document_data))
+        
         doc_id = qdrant_client.add_document(document_data)
         return jsonify({"success": True, "id": doc_id})
     
@@ -112,22 +247,84 @@ def store_document():
         logger.error(f"Error storing document: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status, progress and result of a background job."""
+    try:
+        job = job_queue.get(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job)
+    
+    except Exception as e:
+        logger.error(f"Error getting job {job_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/store-documents', methods=['POST'])
+def store_documents():
+    """Store a batch of documents in the Qdrant collection."""
+    try:
+        data = request.json
+        if not data or not isinstance(data.get('documents'), list):
+            return jsonify({"error": "No documents provided"}), 400
+        
+        documents = []
+        for item in data['documents']:
+            if isinstance(item, dict) and 'text' in item:
+                documents.append({
+                    'text': item['text'],
+                    'title': item.get('title') or '',
+                    'source_type': item.get('source_type', 'manual'),
+                    'source': item.get('source', 'User input')
+                })
+            else:
+                # Let add_documents report the invalid item in place
+                documents.append(item)
+        
+        results = qdrant_client.add_documents(documents)
+        stored_count = sum(1 for result in results if result['success'])
+        
+        return jsonify({
+            "success": stored_count == len(results),
+            "stored_count": stored_count,
+            "failed_count": len(results) - stored_count,
+            "results": results
+        })
+    
+    except Exception as e:
+        logger.error(f"Error storing documents: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/ingest-urls', methods=['POST'])
+def ingest_urls_endpoint():
+    """
+    Ingest a batch of web page, YouTube and sitemap URLs.
+    
+    The batch always runs as a background job; the response is a job ID to
+    poll at /api/jobs/<job_id>, whose result is the ingestion report.
+    """
+    try:
+        data = request.json
+        urls = data.get('urls') if data else None
+        if not isinstance(urls, list) or not urls:
+            return jsonify({"error": "No URLs provided"}), 400
+        
+        invalid = [url for url in urls if not isinstance(url, str) or not url.startswith(('http://', 'https://'))]
+        if invalid:
+            return jsonify({"error": f"Invalid URLs: {invalid[:5]}"}), 400
+        
+        return job_accepted(job_queue.submit('ingest-urls', run_url_ingest_job, urls))
+    
+    except Exception as e:
+        logger.error(f"Error ingesting URLs: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/get-collection-stats', methods=['GET'])
 def get_collection_stats():
     """Get statistics about the Qdrant collection."""
     try:
         stats = qdrant_client.get_collection_stats()
-        
-        # Calculate total storage size based on document metadata
-        documents = qdrant_client.list_documents(limit=1000)  # Adjust limit if you have more documents
-        
-        total_size = 0
-        for doc in documents:
-            if doc.get('payload') and doc['payload'].get('size'):
-                total_size += doc['payload'].get('size', 0)
-        
-        stats['total_size'] = total_size
-        stats['total_size_formatted'] = format_file_size(total_size)
+        stats['total_size_formatted'] = format_file_size(stats.get('total_size', 0))
         
         return jsonify(stats)
     
@@ -150,21 +347,25 @@ def format_file_size(size_bytes):
 
 @app.route('/api/get-documents', methods=['GET'])
 def get_documents():
-    """Get documents from the Qdrant collection."""
+    """
+    Get a page of documents from the Qdrant collection, newest first.
+    
+    Pass the previous response's next_cursor as ?cursor= to get the next page.
+    """
     try:
-        page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 5))
+        cursor = request.args.get('cursor') or None
         
-        offset = (page - 1) * per_page
-        documents = qdrant_client.list_documents(limit=per_page, offset=offset)
-        
-        collection_stats = qdrant_client.get_collection_stats()
-        total_documents = collection_stats.get('vectors_count', 0)
+        try:
+            result = qdrant_client.list_documents_page(limit=per_page, cursor=cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        total_documents = qdrant_client.count_documents()
         
         return jsonify({
-            "documents": documents,
+            "documents": result['documents'],
+            "next_cursor": result['next_cursor'],
             "total": total_documents,
-            "page": page,
             "per_page": per_page,
             "total_pages": (total_documents + per_page - 1) // per_page
         })
@@ -173,6 +374,19 @@ def get_documents():
         logger.error(f"Error getting documents: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/documents/<doc_id>', methods=['GET'])
+def get_document(doc_id):
+    """Get a single document, including its full text."""
+    try:
+        document = qdrant_client.get_document(doc_id)
+        if document is None:
+            return jsonify({"error": "Document not found"}), 404
+        return jsonify(document)
+    
+    except Exception as e:
+        logger.error(f"Error getting document: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/delete-document/<doc_id>', methods=['DELETE'])
 def delete_document(doc_id):
     """Delete a document from the Qdrant collection."""
@@ -196,64 +410,302 @@ def delete_selected_documents():
             return jsonify({"error": "No document IDs provided"}), 400
         
         doc_ids = data['ids']
-        success_count = 0
-        
-        for doc_id in doc_ids:
-            if qdrant_client.delete_document(doc_id):
-                success_count += 1
+        results = qdrant_client.delete_documents(doc_ids)
+        deleted_count = sum(1 for result in results if result['status'] == 'deleted')
         
         return jsonify({
-            "success": True,
-            "deleted_count": success_count,
-            "total_requested": len(doc_ids)
+            "success": all(result['success'] for result in results),
+            "deleted_count": deleted_count,
+            "total_requested": len(doc_ids),
+            "results": results
         })
     
     except Exception as e:
         logger.error(f"Error deleting documents: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def lookup_cached_response(message, cache_flags):
+    """
+    Look up a semantically cached answer for a chat message.
+    
+    Returns:
+        tuple: (query_vector, cached) where cached is None on a miss; both are
+               None when the response cache is disabled or the message could
+               not be embedded, in which case the answer is not cached either
+    """
+    if response_cache is None:
+        return None, None
+    try:
+        query_vector = qdrant_client.embed_query(message)
+    except Exception as e:
+        # Sources that don't need the embedder (e.g. web search) can still answer
+        logger.warning(f"Skipping response cache, could not embed message: {str(e)}")
+        return None, None
+    cached = response_cache.get(query_vector, cache_flags, qdrant_client.revision)
+    if cached is not None:
+        logger.info(f"Answered chat message from response cache (similarity {cached['similarity']:.3f})")
+    return query_vector, cached
+
+def retrieve_sources(message, use_knowledge_search, use_web_search, use_hybrid_search=False):
+    """
+    Query the enabled sources concurrently, tolerating slow or failing ones.
+    
+    Returns:
+        tuple: (knowledge_results, web_results, failures)
+    """
+    sources = {}
+    if use_knowledge_search:
+        sources['knowledge'] = (
+            lambda: qdrant_client.query(message, hybrid=use_hybrid_search, raise_errors=True),
+            KNOWLEDGE_SEARCH_TIMEOUT
+        )
+    if use_web_search:
+        sources['web'] = (lambda: search_web(message, raise_errors=True), WEB_SEARCH_TIMEOUT)
+    retrieval_results, retrieval_failures = fan_out(sources)
+    return retrieval_results.get('knowledge', []), retrieval_results.get('web', []), retrieval_failures
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
-    """Process a chat message and return an AI response with citations."""
+    """
+    Process a chat message and return an AI response with citations.
+    
+    With "debug": true the response also has a 'timings' block giving the
+    milliseconds spent in each stage (embed, vector_search, rerank,
+    web_search, prompt_build, llm) and in total.
+    """
     try:
         data = request.json
         if not data or 'message' not in data:
             return jsonify({"error": "No message provided"}), 400
         
-        message = data['message']
-        use_knowledge_search = data.get('use_knowledge_search', True)
-        use_web_search = data.get('use_web_search', False)
-        
-        # Query knowledge base if enabled
-        knowledge_results = []
-        if use_knowledge_search:
-            knowledge_results = qdrant_client.query(message, limit=3)
-        
-        # Query web search if enabled
-        web_results = []
-        if use_web_search:
-            web_results = search_web(message)
-        
-        # Generate AI response with citations
-        ai_response = generate_ai_response(
-            message, 
-            knowledge_results=knowledge_results, 
-            web_results=web_results
-        )
-        
-        return jsonify({
-            "response": ai_response['response'],
-            "citations": ai_response['citations']
-        })
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            result = answer_chat_message(data)
+        if is_truthy(data.get('debug')):
+            timings['total'] = (time.perf_counter() - started) * 1000
+            result['timings'] = {stage: round(ms, 1) for stage, ms in timings.items()}
+        return jsonify(result)
     
     except Exception as e:
         logger.error(f"Error processing chat message: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def answer_chat_message(data):
+    """Answer a /api/chat request body, from the response cache or by retrieval and generation."""
+    message = data['message']
+    use_knowledge_search = data.get('use_knowledge_search', True)
+    use_web_search = data.get('use_web_search', False)
+    use_hybrid_search = data.get('use_hybrid_search', HYBRID_SEARCH_DEFAULT)
+    
+    # Answer near-duplicate questions from the semantic response cache
+    cache_flags = (bool(use_knowledge_search), bool(use_web_search), bool(use_hybrid_search))
+    query_vector, cached = lookup_cached_response(message, cache_flags)
+    if cached is not None:
+        return {
+            "response": cached['response'],
+            "citations": cached['citations'],
+            "cached": True
+        }
+    # Capture the revision the answer is based on before retrieving
+    revision = qdrant_client.revision
+    
+    knowledge_results, web_results, retrieval_failures = retrieve_sources(
+        message, use_knowledge_search, use_web_search, use_hybrid_search
+    )
+    
+    # Generate AI response with citations
+    ai_response = generate_ai_response(
+        message, 
+        knowledge_results=knowledge_results, 
+        web_results=web_results
+    )
+    
+    # Only cache answers built from complete retrieval results
+    if query_vector is not None and not ai_response.get('error') and not retrieval_failures:
+        response_cache.set(query_vector, cache_flags, revision, {
+            "response": ai_response['response'],
+            "citations": ai_response['citations']
+        })
+    
+    return {
+        "response": ai_response['response'],
+        "citations": ai_response['citations'],
+        "cached": False,
+        "failed_sources": sorted(retrieval_failures),
+        "context": ai_response['context']
+    }
+
+def format_sse(event, data):
+    """Format a server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Process a chat message and stream the AI response as server-sent events.
+    
+    Emits a 'citations' event as soon as retrieval finishes, then one 'token'
+    event per generated text fragment, and finally 'done' (or 'error').
+    """
+    # The stream has not started yet, so a bad body still gets a JSON error
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'message' not in data:
+        return jsonify({"error": "No message provided"}), 400
+    
+    message = data['message']
+    use_knowledge_search = data.get('use_knowledge_search', True)
+    use_web_search = data.get('use_web_search', False)
+    use_hybrid_search = data.get('use_hybrid_search', HYBRID_SEARCH_DEFAULT)
+    
+    def generate():
+        try:
+            cache_flags = (bool(use_knowledge_search), bool(use_web_search), bool(use_hybrid_search))
+            query_vector, cached = lookup_cached_response(message, cache_flags)
+            if cached is not None:
+                yield format_sse('citations', {"citations": cached['citations'], "cached": True})
+                yield format_sse('token', {"text": cached['response']})
+                yield format_sse('done', {"cached": True})
+                return
+            revision = qdrant_client.revision
+            
+            knowledge_results, web_results, retrieval_failures = retrieve_sources(
+                message, use_knowledge_search, use_web_search, use_hybrid_search
+            )
+            prompt, citations, context_report = build_chat_prompt(message, knowledge_results, web_results)
+            
+            # Send citations up front so the UI can render them before the answer
+            yield format_sse('citations', {
+                "citations": citations,
+                "cached": False,
+                "failed_sources": sorted(retrieval_failures),
+                "context": context_report
+            })
+            
+            response_parts = []
+            for text in stream_ai_response(prompt):
+                response_parts.append(text)
+                yield format_sse('token', {"text": text})
+            
+            response_text = ''.join(response_parts)
+            if query_vector is not None and response_text and not retrieval_failures:
+                response_cache.set(query_vector, cache_flags, revision, {
+                    "response": response_text,
+                    "citations": citations
+                })
+            yield format_sse('done', {"cached": False})
+        
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {str(e)}")
+            yield format_sse('error', {"error": str(e)})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.cli.command('ingest')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--source-type', default='text', help='Source type recorded for each document.')
+@click.option('--batch-size', default=INGEST_UPSERT_BATCH_SIZE, show_default=True, help='Points per upsert request.')
+@click.option('--parallel', default=INGEST_PARALLEL, show_default=True, help='Concurrent upsert requests.')
+def ingest_command(paths, source_type, batch_size, parallel):
+    """Bulk-ingest text and PDF files, directories of them, or JSONL files of documents."""
+    documents = []
+    for path in paths:
+        file_paths = [path]
+        if os.path.isdir(path):
+            file_paths = sorted(
+                os.path.join(root, name)
+                for root, _, names in os.walk(path)
+                for name in names
+            )
+        for file_path in file_paths:
+            if file_path.endswith('.jsonl'):
+                # One JSON document per line, as accepted by /api/store-documents
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    documents.extend(json.loads(line) for line in f if line.strip())
+            elif file_path.lower().endswith('.pdf'):
+                with open(file_path, 'rb') as f:
+                    documents.append({
+                        'text': extract_pdf_text(f.read()),
+                        'title': os.path.basename(file_path),
+                        'source_type': 'pdf',
+                        'source': file_path
+                    })
+            else:
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    documents.append({
+                        'text': f.read(),
+                        'title': os.path.basename(file_path),
+                        'source_type': source_type,
+                        'source': file_path
+                    })
+    
+    click.echo(f"Ingesting {len(documents)} documents...")
+    results = qdrant_client.add_documents(documents, upsert_batch_size=batch_size, parallel=parallel)
+    for result in results:
+        if not result['success']:
+            click.echo(f"  [{result['index']}] failed: {result['error']}", err=True)
+    stored_count = sum(1 for result in results if result['success'])
+    click.echo(f"Stored {stored_count} of {len(results)} documents")
+
+@app.cli.command('ingest-urls')
+@click.argument('sources', nargs=-1, required=True)
+@click.option('--concurrency', default=CRAWL_CONCURRENCY, show_default=True, help='Concurrent fetches.')
+@click.option('--host-interval', default=CRAWL_HOST_INTERVAL, show_default=True,
+              help='Minimum seconds between requests to one host.')
+@click.option('--extract-workers', default=CRAWL_EXTRACT_WORKERS, show_default=True, help='Extraction processes.')
+def ingest_urls_command(sources, concurrency, host_interval, extract_workers):
+    """Bulk-ingest web page, YouTube and sitemap URLs, or files listing one URL per line."""
+    urls = []
+    for source in sources:
+        if os.path.isfile(source):
+            with open(source, 'r', encoding='utf-8') as f:
+                urls.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+        else:
+            urls.append(source)
+    
+    def show_progress(fraction, message=None):
+        click.echo(f"\r[{fraction:4.0%}] {message or ''}", nl=False)
+    
+    report = ingest_urls(
+        urls, qdrant_client, concurrency=concurrency, host_interval=host_interval,
+        extract_workers=extract_workers, cache=extraction_cache, progress=show_progress
+    )
+    click.echo()
+    for failure in report['failures']:
+        click.echo(f"  {failure['url']} failed: {failure['error']}", err=True)
+    click.echo(
+        f"Stored {report['stored']} of {report['total']} URLs in {report['elapsed']}s "
+        f"({report['cached']} from cache, {report['duplicates']} duplicates, {report['failed']} failures)"
+    )
+
+@app.cli.command('upgrade-titles')
+def upgrade_titles_command():
+    """Queue documents that still have heuristic titles for Gemini-generated ones."""
+    if qdrant_client.title_upgrader is None:
+        click.echo("Title upgrades are disabled (TITLE_GENERATION is not 'async')", err=True)
+        return
+    queued = qdrant_client.queue_title_upgrades()
+    click.echo(f"Queued {queued} documents; waiting for titles...")
+    qdrant_client.title_upgrader.join()
+    click.echo("Done")
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the collection statistics by scanning document metadata."""
+    qdrant_client.rebuild_stats()
+    click.echo(f"Statistics: {qdrant_client.stats_store.get()}")
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Not found"}), 404
 
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({"error": f"Upload exceeds the {MAX_CONTENT_LENGTH // (1024 * 1024)}MB limit"}), 413
+
 @app.errorhandler(500)
 def server_error(error):
     return jsonify({"error": "Server error"}), 500
@@ -0,0 +1,129 @@
+"""
+Benchmark dense versus hybrid (dense + sparse, RRF-fused) retrieval.
+
+Builds a synthetic corpus in an in-memory Qdrant collection in which each
+target document mentions one rare exact term (a made-up drug name or
+diagnostic code), then asks a question about each term and measures
+recall@k and query latency for both retrieval modes. With --rerank, it also
+sweeps the number of candidates over-fetched for the reranker.
+
+Usage:
+    python -m benchmarks.retrieval [--documents 500] [--queries 50] [--k 3] [--rerank 10,20,50]
+
+Set EMBEDDING_PROVIDER=hash, SPARSE_EMBEDDING_PROVIDER=hash and
+RERANK_PROVIDER=overlap to run fully offline with the deterministic local models.
+"""
+
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from qdrant_client import QdrantClient
+from qdrant_service import QdrantService
+from utils.embedding_cache import EmbeddingCache
+from utils.stats import CollectionStatsStore
+
+FILLER_WORDS = (
+    "autism spectrum children parents therapy support sensory social communication "
+    "school routine behavior development speech language occupational family skills "
+    "diagnosis assessment early intervention resources community program strategies"
+).split()
+
+def make_term(rng, index):
+    """Return a rare exact term: alternately a drug-like name or a diagnostic-style code."""
+    if index % 2 == 0:
+        syllables = ["zol", "vex", "ami", "tra", "quin", "dor", "lex", "pra", "mon"]
+        return ''.join(rng.choice(syllables) for _ in range(3)) + "ine"
+    return f"F{rng.randint(10, 99)}.{rng.randint(0, 9)}-{rng.randint(1000, 9999)}"
+
+def make_sentence(rng):
+    return ' '.join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(8, 16))).capitalize() + '.'
+
+def build_corpus(rng, document_count, query_count):
+    """Return (documents, queries) where each query names the term its target document contains."""
+    documents = []
+    queries = []
+    for index in range(document_count):
+        sentences = [make_sentence(rng) for _ in range(rng.randint(5, 15))]
+        if index < query_count:
+            term = make_term(rng, index)
+            sentences.insert(rng.randrange(len(sentences)), f"Guidance on {term} is summarized here.")
+            queries.append((f"What should families know about {term}?", index, term))
+        documents.append({'text': ' '.join(sentences), 'title': f"Document {index}", 'source_type': 'benchmark'})
+    return documents, queries
+
+def run_mode(service, queries, doc_ids, k, hybrid):
+    hits = 0
+    latencies = []
+    for question, target, _ in queries:
+        start = time.perf_counter()
+        results = service.search(question, limit=k, hybrid=hybrid)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if any(point.payload.get('parent_id') == doc_ids[target] for point in results):
+            hits += 1
+    latencies.sort()
+    return {
+        "recall": hits / len(queries),
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+def run_rerank(service, queries, k, candidates):
+    hits = 0
+    latencies = []
+    for question, _, term in queries:
+        start = time.perf_counter()
+        results = service.query(question, limit=k, rerank_candidates=candidates)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if any(term in text for text in results):
+            hits += 1
+    latencies.sort()
+    return {
+        "recall": hits / len(queries),
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--documents', type=int, default=500)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rerank', default='', help="Comma-separated reranker candidate counts to sweep")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents, queries = build_corpus(rng, args.documents, min(args.queries, args.documents))
+
+    with tempfile.NamedTemporaryFile(suffix='.sqlite3') as stats_file:
+        service = QdrantService(
+            collection_name='retrieval-benchmark',
+            client=QdrantClient(':memory:'),
+            query_cache=EmbeddingCache(max_size=0),
+            stats_store=CollectionStatsStore('retrieval-benchmark', db_path=stats_file.name)
+        )
+        if not service.has_sparse_vectors:
+            raise SystemExit("Sparse embeddings are disabled; set SPARSE_EMBEDDING_PROVIDER to compare hybrid search")
+
+        start = time.perf_counter()
+        results = service.add_documents(documents)
+        print(f"Indexed {len(documents)} documents in {time.perf_counter() - start:.1f}s")
+        doc_ids = [result['id'] for result in results]
+
+        print(f"{'mode':<8} {'recall@' + str(args.k):>10} {'mean ms':>10} {'p95 ms':>10}")
+        for name, hybrid in (('dense', False), ('hybrid', True)):
+            report = run_mode(service, queries, doc_ids, args.k, hybrid)
+            print(f"{name:<8} {report['recall']:>10.2f} {report['mean_ms']:>10.2f} {report['p95_ms']:>10.2f}")
+
+        if args.rerank:
+            if service.reranker is None:
+                raise SystemExit("Reranking is disabled; set RERANK_PROVIDER to sweep candidate counts")
+            for candidates in (int(value) for value in args.rerank.split(',')):
+                report = run_rerank(service, queries, args.k, candidates)
+                name = f"rr@{candidates}"
+                print(f"{name:<8} {report['recall']:>10.2f} {report['mean_ms']:>10.2f} {report['p95_ms']:>10.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Measure peak memory of audio and image extraction for large uploads.
+
+Runs the extractors against an in-process stub of the Gemini endpoints
+(mounted as the HTTP session's transport, so no network is needed) and
+reports the peak memory allocated beyond the upload buffer itself.
+Exits non-zero when either peak exceeds --max-extra-mb, which defaults to
+one upload chunk plus a little slack: streaming uploads should never hold
+more than a chunk of the file at a time, whatever its size.
+
+Usage:
+    python -m benchmarks.upload_memory [--size-mb 20] [--max-extra-mb N]
+"""
+
+import io
+import json
+import sys
+import argparse
+import tracemalloc
+from requests import Response
+from requests.adapters import BaseAdapter
+from werkzeug.datastructures import FileStorage
+from config import GEMINI_UPLOAD_CHUNK_SIZE
+from utils.http import create_session, set_session
+from utils.extractors import extract_text_from_audio, extract_text_from_image
+
+# Allowance beyond one upload chunk for request objects, JSON bodies and the like
+_SLACK = 2 * 1024 * 1024
+
+class StubGeminiAdapter(BaseAdapter):
+    """Answers Files API and generateContent requests, draining request bodies like a socket would."""
+
+    def send(self, request, **kwargs):
+        response = Response()
+        response.status_code = 200
+        response.request = request
+        response.url = request.url
+        if 'upload/v1beta/files' in request.url:
+            response.headers['X-Goog-Upload-URL'] = 'https://stub.invalid/upload-session'
+            body = {}
+        elif 'upload-session' in request.url:
+            body = {"file": {"uri": "https://stub.invalid/files/1"}}
+        else:
+            body = {"candidates": [{"content": {"parts": [{"text": "stub"}]}}]}
+        response.raw = io.BytesIO(json.dumps(body).encode('utf-8'))
+        return response
+
+    def close(self):
+        pass
+
+def measure(extractor, filename, size):
+    upload = FileStorage(stream=io.BytesIO(b'\0' * size), filename=filename)
+    tracemalloc.start()
+    result = extractor(upload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--size-mb', type=float, default=20)
+    parser.add_argument('--max-extra-mb', type=float, default=(GEMINI_UPLOAD_CHUNK_SIZE + _SLACK) / 2**20)
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024)
+    limit = int(args.max_extra_mb * 1024 * 1024)
+
+    set_session(create_session(transport=StubGeminiAdapter()))
+    over_limit = []
+    for name, extractor, filename in (
+        ('audio', extract_text_from_audio, 'clip.mp3'),
+        ('image', extract_text_from_image, 'scan.png'),
+    ):
+        peak, result = measure(extractor, filename, size)
+        print(f"{name:<6} upload {size / 2**20:.1f} MiB  peak extra {peak / 2**20:.1f} MiB  ({result[:40]!r})")
+        if peak > limit:
+            over_limit.append(name)
+
+    if over_limit:
+        print(f"FAIL: peak extra memory above {limit / 2**20:.1f} MiB for {', '.join(over_limit)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"OK: peak extra memory within {limit / 2**20:.1f} MiB")
+
+if __name__ == '__main__':
+    main()
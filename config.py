@@ -13,6 +13,19 @@ SERPER_API_KEY = os.environ.get("SERPER_API_KEY",
 EXA_API_KEY = os.environ.get("EXA_API_KEY",
                             "")
 
+# Outbound API endpoints (override to point at a local stub server)
+GEMINI_API_BASE = os.environ.get("GEMINI_API_BASE", "https://generativelanguage.googleapis.com")
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
+SERPER_API_URL = os.environ.get("SERPER_API_URL", "https://google.serper.dev/search")
+
+# Outbound HTTP client settings
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))  # Seconds
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 60))  # Seconds between bytes received
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))  # Retries on 429/5xx and connection errors
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))  # Exponential backoff base, in seconds
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))  # Hosts with pooled connections
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 20))  # Keep-alive connections per host
+
 # Qdrant Configuration
 QDRANT_URL = os.environ.get(
     "QDRANT_URL",
@@ -24,14 +37,115 @@ QDRANT_API_KEY = os.environ.get(
 )
 QDRANT_COLLECTION_NAME = os.environ.get("QDRANT_COLLECTION_NAME",
                                        "knowledge-base")
+# Embedded Qdrant: ':memory:' or a directory path runs Qdrant in-process instead of
+# connecting to QDRANT_URL (an on-disk path can only be opened by one process)
+QDRANT_LOCATION = os.environ.get("QDRANT_LOCATION", "")
+QDRANT_BACKGROUND_INIT = os.environ.get("QDRANT_BACKGROUND_INIT", "true").lower() == "true"  # Don't block startup
 
 # Application Settings
 VECTOR_SIZE = 768  # Dimensions for the embedding vectors
-CHUNK_SIZE = 4000  # Maximum characters per chunk
+CHUNK_SIZE = 1800  # Maximum characters per chunk; ~450 tokens fits the 512-token embedding window
 CHUNK_OVERLAP = 200  # Characters of overlap between chunks
 
+# Logging and instrumentation
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()  # Configured once, in app.py
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() == "true"  # Serve /metrics
+
+# Embedding settings
+EMBEDDING_PROVIDER = os.environ.get("EMBEDDING_PROVIDER", "fastembed")  # 'fastembed' or 'hash'
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "BAAI/bge-base-en-v1.5")
+EMBEDDING_PRELOAD = os.environ.get("EMBEDDING_PRELOAD", "false").lower() == "true"  # Block startup on model loading
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "false").lower() == "true"  # Load models in the background at startup
+SPARSE_EMBEDDING_PROVIDER = os.environ.get("SPARSE_EMBEDDING_PROVIDER", "fastembed")  # 'fastembed', 'hash' or 'none'
+SPARSE_EMBEDDING_MODEL_NAME = os.environ.get("SPARSE_EMBEDDING_MODEL_NAME", "Qdrant/bm25")
+
+# Hybrid (dense + sparse) retrieval settings
+HYBRID_SEARCH_DEFAULT = os.environ.get("HYBRID_SEARCH_DEFAULT", "false").lower() == "true"  # Default for /api/chat
+HYBRID_CANDIDATES = int(os.environ.get("HYBRID_CANDIDATES", 20))  # Candidates per retriever before fusion
+
+# Reranking settings for /api/chat
+RERANK_PROVIDER = os.environ.get("RERANK_PROVIDER", "fastembed")  # 'fastembed', 'overlap' or 'none'
+RERANK_MODEL_NAME = os.environ.get("RERANK_MODEL_NAME", "Xenova/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.environ.get("RERANK_CANDIDATES", 20))  # Chunks fetched before reranking
+RERANK_TOP_K = int(os.environ.get("RERANK_TOP_K", 3))  # Maximum chunks kept after reranking
+RERANK_TOKEN_BUDGET = int(os.environ.get("RERANK_TOKEN_BUDGET", 3000))  # Approximate tokens kept after reranking
+
+# Prompt context settings for /api/chat
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 4000))  # Approximate tokens of retrieved context
+CONTEXT_MIN_PASSAGE_TOKENS = int(os.environ.get("CONTEXT_MIN_PASSAGE_TOKENS", 100))  # Smallest trimmed passage kept
+
+# Query embedding cache settings
+QUERY_CACHE_BACKEND = os.environ.get("QUERY_CACHE_BACKEND", "memory")  # 'memory', 'sqlite' or 'none'
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", 1024))  # Maximum cached query embeddings
+QUERY_CACHE_TTL = int(os.environ.get("QUERY_CACHE_TTL", 3600))  # Seconds before an entry expires
+QUERY_CACHE_PATH = os.environ.get("QUERY_CACHE_PATH", "/tmp/query_embedding_cache.sqlite3")  # Shared by workers
+
+# Persistent store of document chunk embeddings, replayed when re-indexing
+EMBEDDING_STORE_ENABLED = os.environ.get("EMBEDDING_STORE_ENABLED", "true").lower() == "true"
+EMBEDDING_STORE_PATH = os.environ.get("EMBEDDING_STORE_PATH", "/tmp/embedding_store")  # Directory shared by workers
+EMBEDDING_STORE_DTYPE = os.environ.get("EMBEDDING_STORE_DTYPE", "float32")  # 'float32' or 'float16' (half the disk)
+
+# Persistent cache of extracted text for /api/extract-content, keyed by URL or file hash
+EXTRACTION_CACHE_ENABLED = os.environ.get("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+EXTRACTION_CACHE_PATH = os.environ.get("EXTRACTION_CACHE_PATH", "/tmp/extraction_cache.sqlite3")  # Shared by workers
+EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get("EXTRACTION_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # Compressed text
+EXTRACTION_CACHE_TTL = int(os.environ.get("EXTRACTION_CACHE_TTL", 7 * 86400))  # Seconds; web pages change
+
+# Semantic response cache settings for /api/chat
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 256))  # Maximum cached responses
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", 600))  # Seconds; also bounds staleness across workers
+RESPONSE_CACHE_THRESHOLD = float(os.environ.get("RESPONSE_CACHE_THRESHOLD", 0.95))  # Minimum cosine similarity
+
+# Retrieval settings for /api/chat
+RETRIEVAL_MAX_WORKERS = int(os.environ.get("RETRIEVAL_MAX_WORKERS", 8))  # Threads shared by all retrieval lookups
+KNOWLEDGE_SEARCH_TIMEOUT = float(os.environ.get("KNOWLEDGE_SEARCH_TIMEOUT", 5))  # Seconds
+WEB_SEARCH_TIMEOUT = float(os.environ.get("WEB_SEARCH_TIMEOUT", 5))  # Seconds
+
+# Background job settings
+JOB_DB_PATH = os.environ.get("JOB_DB_PATH", "/tmp/jobs.sqlite3")  # Job table shared by all workers
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))  # Background job threads per worker process
+JOB_RETENTION = int(os.environ.get("JOB_RETENTION", 86400))  # Seconds to keep finished jobs
+
+# Collection statistics store
+STATS_DB_PATH = os.environ.get("STATS_DB_PATH", "/tmp/collection_stats.sqlite3")
+
+# Bulk ingestion settings
+INGEST_EMBED_BATCH_SIZE = int(os.environ.get("INGEST_EMBED_BATCH_SIZE", 64))  # Chunks per embedding call
+INGEST_UPSERT_BATCH_SIZE = int(os.environ.get("INGEST_UPSERT_BATCH_SIZE", 256))  # Points per upsert request
+INGEST_PARALLEL = int(os.environ.get("INGEST_PARALLEL", 4))  # Concurrent upsert requests
+DELETE_BATCH_SIZE = int(os.environ.get("DELETE_BATCH_SIZE", 1000))  # Documents per delete request
+
+# Batch URL ingestion settings (flask ingest-urls and /api/ingest-urls)
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", 8))  # Concurrent fetches across all hosts
+CRAWL_HOST_INTERVAL = float(os.environ.get("CRAWL_HOST_INTERVAL", 1.0))  # Seconds between requests to one host
+CRAWL_EXTRACT_WORKERS = int(os.environ.get("CRAWL_EXTRACT_WORKERS", min(4, os.cpu_count() or 1)))  # Processes
+CRAWL_STORE_BATCH_SIZE = int(os.environ.get("CRAWL_STORE_BATCH_SIZE", 32))  # Documents per add_documents call
+CRAWL_MAX_URLS = int(os.environ.get("CRAWL_MAX_URLS", 1000))  # Pages per batch, after expanding sitemaps
+CRAWL_MAX_PAGE_BYTES = int(os.environ.get("CRAWL_MAX_PAGE_BYTES", 5 * 1024 * 1024))  # Larger pages are skipped
+
+# Duplicate detection on ingest
+DEDUP_MODE = os.environ.get("DEDUP_MODE", "exact")  # 'exact', 'near' (exact plus MinHash) or 'off'
+DEDUP_ON_DUPLICATE = os.environ.get("DEDUP_ON_DUPLICATE", "skip")  # 'skip' or 'update' (metadata only)
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", 0.9))  # Minimum estimated Jaccard
+MINHASH_PERMUTATIONS = int(os.environ.get("MINHASH_PERMUTATIONS", 128))  # Signature length
+MINHASH_BANDS = int(os.environ.get("MINHASH_BANDS", 32))  # LSH bands; must divide MINHASH_PERMUTATIONS
+
+# Document title generation
+TITLE_GENERATION = os.environ.get("TITLE_GENERATION", "async")  # 'async', 'sync' (Gemini inline) or 'heuristic'
+TITLE_BATCH_SIZE = int(os.environ.get("TITLE_BATCH_SIZE", 20))  # Documents titled per Gemini request
+TITLE_BATCH_DELAY = float(os.environ.get("TITLE_BATCH_DELAY", 2))  # Seconds to wait for a batch to fill
+
+# PDF extraction settings
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", 1000))  # Pages extracted before stopping
+PDF_TIME_BUDGET = float(os.environ.get("PDF_TIME_BUDGET", 120))  # Seconds before extraction stops
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", min(4, os.cpu_count() or 1)))  # Extraction processes per app process
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", 16))  # Pages per worker task
+# Smaller PDFs are extracted inline: measured with a warm pool, each worker re-parsing the PDF
+# cancels out the parallel speed-up below ~100 pages of light text
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", 128))
+
 # File upload settings
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 ALLOWED_EXTENSIONS = {
     'txt': ['text/plain'],
     'pdf': ['application/pdf'],
@@ -42,3 +156,7 @@ ALLOWED_EXTENSIONS = {
     'png': ['image/png'],
 }
 MAX_CONTENT_LENGTH = 20 * 1024 * 1024  # 20MB max upload size
+
+# Gemini file handling for audio and image extraction
+GEMINI_UPLOAD_CHUNK_SIZE = int(os.environ.get("GEMINI_UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))  # Multiple of 256KB
+GEMINI_INLINE_MAX_BYTES = int(os.environ.get("GEMINI_INLINE_MAX_BYTES", 1024 * 1024))  # Larger images use the Files API
@@ -1,3 +1,8 @@
+import os
+
+# The development server is a web server too: load models before the first chat
+os.environ.setdefault("MODEL_WARMUP", "true")
+
 from app import app
 
 if __name__ == "__main__":
@@ -1,26 +1,234 @@
+import json
+import time
 import uuid
+import base64
 import logging
 import datetime
-from config import QDRANT_URL, QDRANT_API_KEY, QDRANT_COLLECTION_NAME, VECTOR_SIZE
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    QDRANT_URL, QDRANT_API_KEY, QDRANT_COLLECTION_NAME, QDRANT_LOCATION, QDRANT_BACKGROUND_INIT,
+    VECTOR_SIZE, EMBEDDING_PRELOAD, MODEL_WARMUP,
+    INGEST_EMBED_BATCH_SIZE, INGEST_UPSERT_BATCH_SIZE, INGEST_PARALLEL, DELETE_BATCH_SIZE,
+    HYBRID_CANDIDATES, RERANK_CANDIDATES, RERANK_TOP_K, RERANK_TOKEN_BUDGET,
+    DEDUP_MODE, DEDUP_ON_DUPLICATE, NEAR_DUPLICATE_THRESHOLD, TITLE_GENERATION
+)
 from qdrant_client import QdrantClient
 import qdrant_client.http.models as models
 from utils.ai import generate_title_for_content
+from utils.embeddings import get_embedding_provider, get_sparse_embedding_provider
+from utils.embedding_cache import get_query_embedding_cache
+from utils.embedding_store import get_embedding_store
+from utils.chunking import chunk_text, join_chunks
+from utils.rerank import get_reranker, rerank
+from utils.metrics import span
+from utils.dedup import (
+    content_hash, document_id_for_hash, minhash_signature, minhash_bands, estimate_similarity
+)
+from utils.stats import CollectionStatsStore
+from utils.titles import (
+    TitleUpgrader, heuristic_title, UNTITLED, TITLE_SOURCE_USER, TITLE_SOURCE_HEURISTIC, TITLE_SOURCE_GENERATED
+)
 
 logger = logging.getLogger(__name__)
 
+DENSE_VECTOR_NAME = "fast-bge-base-en-v1.5"
+SPARSE_VECTOR_NAME = "bm25"
+
+def chunk_point_id(doc_id, chunk_index):
+    """
+    Return the point ID for a chunk of a document.
+
+    The first chunk reuses the document ID so that documents can be addressed
+    by a single point; later chunks get stable IDs derived from it.
+    """
+    if chunk_index == 0:
+        return doc_id
+    return str(uuid.uuid5(uuid.UUID(str(doc_id)), str(chunk_index)))
+
+def is_document_id(doc_id):
+    """Return whether doc_id could name a document; they are all UUIDs."""
+    try:
+        uuid.UUID(str(doc_id))
+    except ValueError:
+        return False
+    return True
+
+# Payload fields the collection statistics are computed from
+STATS_PAYLOAD_FIELDS = ["size", "source_type"]
+
+# Payload fields needed to render a document in the collection browser
+LISTING_PAYLOAD_FIELDS = ["title", "preview", "size", "chars", "words", "source", "source_type", "timestamp"]
+
+# Payload fields that describe a single chunk rather than the whole document
+CHUNK_PAYLOAD_FIELDS = {"text", "parent_id", "chunk_index", "chunk_count", "chunk_start", "chunk_end"}
+
+# Payload fields stored only on a document's first chunk (near-duplicate detection)
+DOCUMENT_ONLY_PAYLOAD_FIELDS = {"minhash", "minhash_bands"}
+
+def encode_cursor(position):
+    """Encode a pagination position as an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+def document_filter():
+    """Filter matching one point per document (the first chunk, or legacy unchunked points)."""
+    return models.Filter(
+        should=[
+            models.FieldCondition(key="chunk_index", match=models.MatchValue(value=0)),
+            models.IsEmptyCondition(is_empty=models.PayloadField(key="chunk_index")),
+        ]
+    )
+
 class QdrantService:
-    def __init__(self, url=QDRANT_URL, api_key=QDRANT_API_KEY, collection_name=QDRANT_COLLECTION_NAME):
+    def __init__(self, url=QDRANT_URL, api_key=QDRANT_API_KEY, collection_name=QDRANT_COLLECTION_NAME,
+                 embedder=None, preload_embedder=EMBEDDING_PRELOAD, warm_up=MODEL_WARMUP, query_cache=None, stats_store=None,
+                 sparse_embedder=None, reranker=None, client=None, dedup_mode=DEDUP_MODE,
+                 on_duplicate=DEDUP_ON_DUPLICATE, embedding_store=None, location=QDRANT_LOCATION,
+                 background_init=QDRANT_BACKGROUND_INIT, title_generation=TITLE_GENERATION, title_upgrader=None):
+        """
+        Create the service.
+        
+        With location set to ':memory:' or a directory path, Qdrant runs
+        embedded in this process instead of connecting to url. With
+        background_init, connecting and checking the collection happen on a
+        background thread; the first operation that needs the collection waits
+        for it (retrying if it failed) instead of blocking startup.
+        
+        Models are loaded on first use, unless preload_embedder loads them
+        before returning or warm_up loads them on a background thread. The web
+        server sets warm_up, so the first chat's knowledge search doesn't spend
+        its timeout loading them; CLI commands and benchmarks don't need them.
+        
+        title_generation controls untitled documents: 'heuristic' titles them
+        from their text, 'async' does the same and then upgrades the title with
+        a batched Gemini request off the critical path, and 'sync' asks Gemini
+        before storing.
+        """
         self.url = url
         self.api_key = api_key
+        self.location = location
         self.collection_name = collection_name
-        self.client = self._initialize_client()
-        self._ensure_collection_exists()
+        self._embedder = embedder
+        self._sparse_embedder = sparse_embedder
+        self._reranker = reranker
+        self.dedup_mode = dedup_mode
+        self.on_duplicate = on_duplicate
+        self.title_generation = title_generation
+        if title_upgrader is None and title_generation == 'async':
+            title_upgrader = TitleUpgrader(self.apply_generated_title)
+        self.title_upgrader = title_upgrader
+        self._has_sparse_vectors = False
+        self.query_cache = query_cache if query_cache is not None else get_query_embedding_cache()
+        self.embedding_store = embedding_store if embedding_store is not None else get_embedding_store()
+        self.revision = 0
+        self._revision_lock = threading.Lock()
+        if stats_store is None:
+            # The same collection name on another Qdrant instance is a different collection
+            stats_store = CollectionStatsStore(f"{location or url}#{collection_name}")
+        self.stats_store = stats_store
+        self._client = client
+        self._ready = threading.Event()
+        self._init_lock = threading.Lock()
+        if background_init:
+            threading.Thread(target=self._initialize_in_background, name='qdrant-init', daemon=True).start()
+        else:
+            self._initialize()
+        if preload_embedder:
+            self._warm_up_models()
+        elif warm_up:
+            threading.Thread(target=self._warm_up_models_in_background, name='model-warmup', daemon=True).start()
+
+    def _initialize(self):
+        """Create the client if needed and ensure the collection exists, once."""
+        with self._init_lock:
+            if self._ready.is_set():
+                return
+            if self._client is None:
+                self._client = self._initialize_client()
+            self._ensure_collection_exists()
+            self._ready.set()
+
+    def _warm_up_models(self):
+        """Load the embedding, sparse embedding and reranking models."""
+        for model in (self.embedder, self.sparse_embedder, self.reranker):
+            if model is not None:
+                model.warmup()
+
+    def _warm_up_models_in_background(self):
+        try:
+            self._warm_up_models()
+        except Exception as e:
+            # Models that failed to load are loaded again on first use
+            logger.error(f"Background model loading failed: {str(e)}")
+
+    def _initialize_in_background(self):
+        try:
+            self._initialize()
+        except Exception as e:
+            # The next operation that needs the client retries initialization
+            logger.error(f"Background Qdrant initialization failed: {str(e)}")
+
+    @property
+    def client(self):
+        """The Qdrant client, waiting for (or retrying) initialization if it hasn't finished."""
+        if not self._ready.is_set():
+            self._initialize()
+        return self._client
+
+    @property
+    def has_sparse_vectors(self):
+        """Whether the collection stores sparse vectors, i.e. supports hybrid search."""
+        if not self._ready.is_set():
+            self._initialize()
+        return self._has_sparse_vectors
+
+    @property
+    def embedder(self):
+        """The embedding provider, defaulting to the shared process-wide one."""
+        return self._embedder if self._embedder is not None else get_embedding_provider()
+
+    @property
+    def sparse_embedder(self):
+        """The sparse embedding provider, or None when sparse vectors are disabled."""
+        return self._sparse_embedder if self._sparse_embedder is not None else get_sparse_embedding_provider()
+
+    @property
+    def reranker(self):
+        """The reranker applied to query results, or None when reranking is disabled."""
+        return self._reranker if self._reranker is not None else get_reranker()
+
+    def _bump_revision(self):
+        """Record that the collection contents changed, invalidating revision-keyed caches."""
+        with self._revision_lock:
+            self.revision += 1
+
+    def embed_query(self, query_text):
+        """Embed a query, consulting the query embedding cache first."""
+        with span('embed'):
+            if self.query_cache is None:
+                return self.embedder.embed_query(query_text)
+            embedder = self.embedder
+            return self.query_cache.get_or_compute(query_text, embedder.model_name, embedder.embed_query)
 
     def _initialize_client(self):
-        """Initialize the Qdrant client."""
+        """Initialize the Qdrant client, embedded when a local location is configured."""
         try:
-            client = QdrantClient(url=self.url, api_key=self.api_key)
-            logger.info(f"Connected to Qdrant at {self.url}")
+            if self.location == ':memory:':
+                client = QdrantClient(location=':memory:')
+                logger.info("Using in-memory embedded Qdrant")
+            elif self.location:
+                client = QdrantClient(path=self.location)
+                logger.info(f"Using embedded Qdrant stored at {self.location}")
+            else:
+                client = QdrantClient(url=self.url, api_key=self.api_key)
+                logger.info(f"Connected to Qdrant at {self.url}")
             return client
         except Exception as e:
             logger.error(f"Failed to initialize Qdrant client: {str(e)}")
@@ -29,172 +237,623 @@ class QdrantService:
     def _ensure_collection_exists(self):
         """Ensure that the collection exists, create it if it doesn't."""
         try:
-            collections = self.client.get_collections().collections
+            collections = self._client.get_collections().collections
             collection_names = [c.name for c in collections]
             
             if self.collection_name not in collection_names:
+                # Store a BM25-style sparse vector next to the dense one when enabled,
+                # with IDF weighting applied by Qdrant
+                sparse_vectors_config = None
+                if self.sparse_embedder is not None:
+                    sparse_vectors_config = {
+                        SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)
+                    }
+                
                 # Create a collection with the correct vector configuration
-                self.client.create_collection(
+                self._client.create_collection(
                     collection_name=self.collection_name,
                     vectors_config={
-                        "fast-bge-base-en-v1.5": models.VectorParams(
+                        DENSE_VECTOR_NAME: models.VectorParams(
                             size=VECTOR_SIZE,  # BGE model embeddings size
                             distance=models.Distance.COSINE
                         )
-                    }
+                    },
+                    sparse_vectors_config=sparse_vectors_config
                 )
+                self._has_sparse_vectors = sparse_vectors_config is not None
+                # Counters left from an earlier collection of this name (or an
+                # in-memory instance that died with its process) no longer apply
+                self.stats_store.reset()
                 logger.info(f"Created collection '{self.collection_name}'")
+                self._ensure_payload_indexes()
             else:
                 # Check if the collection has the correct vector configuration
-                collection_info = self.client.get_collection(self.collection_name)
+                collection_info = self._client.get_collection(self.collection_name)
                 has_correct_vector = False
                 
                 try:
                     vectors_config = collection_info.config.params.vectors
-                    if isinstance(vectors_config, dict) and "fast-bge-base-en-v1.5" in vectors_config:
+                    if isinstance(vectors_config, dict) and DENSE_VECTOR_NAME in vectors_config:
                         has_correct_vector = True
-                    elif hasattr(vectors_config, "name") and vectors_config.name == "fast-bge-base-en-v1.5":
+                    elif hasattr(vectors_config, "name") and vectors_config.name == DENSE_VECTOR_NAME:
                         has_correct_vector = True
                 except AttributeError:
                     pass
                 
+                # Sparse vectors can't be added to an existing collection, so hybrid
+                # search is only available if the collection was created with them
+                sparse_config = getattr(collection_info.config.params, 'sparse_vectors', None) or {}
+                self._has_sparse_vectors = SPARSE_VECTOR_NAME in sparse_config and self.sparse_embedder is not None
+                if self.sparse_embedder is not None and not self._has_sparse_vectors:
+                    logger.warning(
+                        f"Collection '{self.collection_name}' predates sparse vectors; "
+                        f"hybrid search is unavailable until it is recreated"
+                    )
+                
                 if not has_correct_vector:
                     logger.warning(f"Collection '{self.collection_name}' exists but doesn't have the correct vector configuration.")
                     # We can't modify a collection's vector configuration after creation
                     # For safety, we'll still use the existing collection
                 else:
                     logger.info(f"Collection '{self.collection_name}' already exists with correct vector configuration")
+                self._ensure_payload_indexes()
         except Exception as e:
             logger.error(f"Error ensuring collection exists: {str(e)}")
             raise
 
-    def add_document(self, document_data):
+    def _ensure_payload_indexes(self):
+        """Create the payload indexes used to group chunks by document and order documents by time."""
+        indexes = {
+            "parent_id": models.PayloadSchemaType.KEYWORD,
+            "chunk_index": models.PayloadSchemaType.INTEGER,
+            "timestamp": models.PayloadSchemaType.DATETIME,
+            "minhash_bands": models.PayloadSchemaType.KEYWORD,
+            "title_source": models.PayloadSchemaType.KEYWORD,
+        }
+        for field_name, field_schema in indexes.items():
+            try:
+                self._client.create_payload_index(
+                    collection_name=self.collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema
+                )
+            except Exception as e:
+                logger.warning(f"Could not create payload index on '{field_name}': {str(e)}")
+
+    def _prepare_document(self, document_data):
         """
-        Add a document to the collection and return its ID.
+        Normalize document input into (doc_id, document_text, metadata).
         
         If document_data is a string, treat it as the text content.
         If document_data is a dictionary, it should have at least a 'text' field,
         and can optionally include metadata like 'title', 'source', etc.
+        
+        Unless deduplication is off, the document ID is derived from the hash
+        of the normalized text, so the same content always gets the same ID.
+        The title is filled in separately by _ensure_title, once the document
+        is known not to be a duplicate.
         """
-        try:
-            # Generate a unique ID for the document
-            doc_id = str(uuid.uuid4())
-            
-            # Check if we're getting just text or a dictionary with metadata
-            if isinstance(document_data, str):
-                # It's a simple text string
-                document_text = document_data
-                metadata = {}
-            elif isinstance(document_data, bytes):
-                # It's binary data, convert to string
-                try:
-                    document_text = document_data.decode('utf-8')
-                except UnicodeDecodeError:
-                    document_text = document_data.decode('utf-8', errors='replace')
-                metadata = {}
-            elif isinstance(document_data, dict) and 'text' in document_data:
-                # It's a dictionary with text and metadata
-                document_text = document_data['text']
-                # If text is bytes, convert to string
-                if isinstance(document_text, bytes):
-                    try:
-                        document_text = document_text.decode('utf-8')
-                    except UnicodeDecodeError:
-                        document_text = document_text.decode('utf-8', errors='replace')
-                metadata = {k: v for k, v in document_data.items() if k != 'text'}
-            else:
-                raise ValueError("Document data must be a string, bytes, or a dictionary with a 'text' field")
-            
-            # Create a clean preview by removing extra whitespace
-            clean_text = ' '.join(document_text.split())
-            # Truncate the document preview for metadata (keep first 150 chars)
-            doc_preview = clean_text[:150] + "..." if len(clean_text) > 150 else clean_text
-            
-            # Create timestamp for upload time if not provided
-            if 'timestamp' not in metadata:
-                metadata['timestamp'] = datetime.datetime.now().isoformat()
-            
-            # Add basic metadata if not provided
-            if 'preview' not in metadata:
-                metadata['preview'] = doc_preview
-            if 'size' not in metadata:
-                metadata['size'] = len(document_text)
-            if 'chars' not in metadata:
-                metadata['chars'] = len(document_text)
-            if 'words' not in metadata:
-                metadata['words'] = len(document_text.split())
-            if 'lines' not in metadata:
-                metadata['lines'] = len(document_text.splitlines())
-                
-            # Generate title if not provided
-            if 'title' not in metadata or not metadata['title']:
-                try:
-                    # Generate a title using Gemini
-                    metadata['title'] = generate_title_for_content(document_text)
-                    logger.info(f"Generated title: {metadata['title']}")
-                except Exception as e:
-                    logger.warning(f"Error generating title: {str(e)}")
-                    # Use the first 30 characters of the text as a fallback title
-                    first_line = document_text.strip().split('\n')[0]
-                    metadata['title'] = (first_line[:30] + '...') if len(first_line) > 30 else first_line
-            
-            # Make sure document_text is a string, not bytes
+        # Check if we're getting just text or a dictionary with metadata
+        if isinstance(document_data, str):
+            # It's a simple text string
+            document_text = document_data
+            metadata = {}
+        elif isinstance(document_data, bytes):
+            # It's binary data, convert to string
+            try:
+                document_text = document_data.decode('utf-8')
+            except UnicodeDecodeError:
+                document_text = document_data.decode('utf-8', errors='replace')
+            metadata = {}
+        elif isinstance(document_data, dict) and 'text' in document_data:
+            # It's a dictionary with text and metadata
+            document_text = document_data['text']
+            # If text is bytes, convert to string
             if isinstance(document_text, bytes):
                 try:
                     document_text = document_text.decode('utf-8')
                 except UnicodeDecodeError:
-                    # If decoding as UTF-8 fails, try a more lenient approach
                     document_text = document_text.decode('utf-8', errors='replace')
-                    
-            # Generate embedding for the document text using fastembed
-            from fastembed import TextEmbedding
-            
-            # Initialize the embedding model
-            embedding_model = TextEmbedding(model_name="BAAI/bge-base-en-v1.5")
-            
-            # Generate embeddings for the document text
-            embeddings = list(embedding_model.embed([document_text]))
-            vector = embeddings[0].tolist()
-            
-            # Update metadata to include text for retrieval
-            metadata['text'] = document_text
-            
-            # Add the document to the collection with vectors and metadata
-            self.client.upsert(
+            metadata = {k: v for k, v in document_data.items() if k != 'text'}
+        else:
+            raise ValueError("Document data must be a string, bytes, or a dictionary with a 'text' field")
+        
+        # Create a clean preview by removing extra whitespace
+        clean_text = ' '.join(document_text.split())
+        # Truncate the document preview for metadata (keep first 150 chars)
+        doc_preview = clean_text[:150] + "..." if len(clean_text) > 150 else clean_text
+        
+        # Create timestamp for upload time if not provided
+        if 'timestamp' not in metadata:
+            metadata['timestamp'] = datetime.datetime.now().isoformat()
+        
+        # Add basic metadata if not provided
+        if 'preview' not in metadata:
+            metadata['preview'] = doc_preview
+        if 'size' not in metadata:
+            metadata['size'] = len(document_text)
+        if 'chars' not in metadata:
+            metadata['chars'] = len(document_text)
+        if 'words' not in metadata:
+            metadata['words'] = len(document_text.split())
+        if 'lines' not in metadata:
+            metadata['lines'] = len(document_text.splitlines())
+        
+        if self.dedup_mode == 'off':
+            # Generate a unique ID for the document
+            doc_id = str(uuid.uuid4())
+        else:
+            metadata['content_hash'] = content_hash(document_text)
+            doc_id = document_id_for_hash(metadata['content_hash'])
+            if self.dedup_mode == 'near':
+                metadata['minhash'] = minhash_signature(document_text)
+                metadata['minhash_bands'] = minhash_bands(metadata['minhash'])
+        
+        return doc_id, document_text, metadata
+
+    def _ensure_title(self, document_text, metadata):
+        """
+        Give the document a title if it doesn't have one, recording its 'title_source'.
+        
+        Returns:
+            bool: True if the title should be upgraded by the title upgrader
+        """
+        if metadata.get('title'):
+            metadata.setdefault('title_source', TITLE_SOURCE_USER)
+            return False
+        
+        if self.title_generation == 'sync':
+            # Generate a title using Gemini
+            title = generate_title_for_content(document_text)
+            if title and title != UNTITLED:
+                metadata['title'] = title
+                metadata['title_source'] = TITLE_SOURCE_GENERATED
+                logger.info(f"Generated title: {metadata['title']}")
+                return False
+        
+        metadata['title'] = heuristic_title(document_text)
+        metadata['title_source'] = TITLE_SOURCE_HEURISTIC
+        return self.title_upgrader is not None
+
+    def apply_generated_title(self, doc_id, title):
+        """Replace a document's heuristic title with a generated one, unless it has since changed."""
+        self.client.set_payload(
+            collection_name=self.collection_name,
+            payload={'title': title, 'title_source': TITLE_SOURCE_GENERATED},
+            points=models.FilterSelector(filter=models.Filter(
+                must=[models.FieldCondition(key="title_source", match=models.MatchValue(value=TITLE_SOURCE_HEURISTIC))],
+                should=[
+                    models.HasIdCondition(has_id=[doc_id]),
+                    models.FieldCondition(key="parent_id", match=models.MatchValue(value=doc_id)),
+                ]
+            ))
+        )
+
+    def queue_title_upgrades(self):
+        """Queue every document that still has a heuristic title for a generated one. Returns the count."""
+        if self.title_upgrader is None:
+            return 0
+        queued = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
                 collection_name=self.collection_name,
-                points=[
-                    models.PointStruct(
-                        id=doc_id,
-                        vector={"fast-bge-base-en-v1.5": vector},
-                        payload=metadata
-                    )
+                scroll_filter=models.Filter(must=[
+                    document_filter(),
+                    models.FieldCondition(key="title_source", match=models.MatchValue(value=TITLE_SOURCE_HEURISTIC)),
+                ]),
+                limit=256,
+                offset=offset,
+                with_payload=["text"],
+                with_vectors=False
+            )
+            for point in points:
+                self.title_upgrader.submit(str(point.id), (point.payload or {}).get('text', ''))
+                queued += 1
+            if offset is None:
+                break
+        return queued
+
+    def _find_duplicates(self, documents):
+        """
+        Find stored documents that duplicate the given prepared documents.
+        
+        Exact duplicates are found by their content-derived ID. In 'near' mode,
+        documents sharing a MinHash band with the candidate are compared by
+        estimated Jaccard similarity against NEAR_DUPLICATE_THRESHOLD.
+        
+        Args:
+            documents (list): (key, doc_id, metadata) tuples
+        
+        Returns:
+            dict: key -> {'id', 'exact', 'similarity', 'payload'} for each duplicate
+                  found, where payload holds the stored document's statistics fields
+        """
+        if self.dedup_mode == 'off' or not documents:
+            return {}
+        
+        existing = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=[doc_id for _, doc_id, _ in documents],
+            with_payload=STATS_PAYLOAD_FIELDS,
+            with_vectors=False
+        )
+        payloads = {str(point.id): point.payload or {} for point in existing}
+        duplicates = {}
+        for key, doc_id, metadata in documents:
+            if doc_id in payloads:
+                duplicates[key] = {"id": doc_id, "exact": True, "similarity": 1.0, "payload": payloads[doc_id]}
+            elif self.dedup_mode == 'near':
+                candidates, _ = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=models.Filter(must=[
+                        models.FieldCondition(key="minhash_bands", match=models.MatchAny(any=metadata['minhash_bands']))
+                    ]),
+                    limit=10,
+                    with_payload=["minhash"] + STATS_PAYLOAD_FIELDS,
+                    with_vectors=False
+                )
+                best = max(
+                    ((estimate_similarity(metadata['minhash'], (point.payload or {}).get('minhash')), point)
+                     for point in candidates),
+                    key=lambda item: item[0],
+                    default=(0.0, None)
+                )
+                if best[0] >= NEAR_DUPLICATE_THRESHOLD:
+                    payload = {k: v for k, v in best[1].payload.items() if k != 'minhash'}
+                    duplicates[key] = {"id": str(best[1].id), "exact": False, "similarity": best[0], "payload": payload}
+        return duplicates
+
+    def _handle_duplicate(self, duplicate, metadata):
+        """
+        Resolve an incoming document that duplicates a stored one.
+        
+        Near-duplicates and, by default, exact duplicates are skipped. With
+        on_duplicate='update', an exact duplicate's stored metadata (except its
+        original timestamp) is replaced by the incoming metadata without
+        re-embedding anything. The stored title is kept unless a real title is
+        given, which then becomes a user title that title upgrades leave alone.
+        """
+        doc_id = duplicate['id']
+        if self.on_duplicate != 'update' or not duplicate['exact']:
+            logger.info(f"Skipped duplicate of document {doc_id} (similarity {duplicate['similarity']:.2f})")
+            return
+        
+        updates = {
+            k: v for k, v in metadata.items()
+            if k not in DOCUMENT_ONLY_PAYLOAD_FIELDS and k not in ('timestamp', 'title', 'title_source')
+        }
+        title = metadata.get('title')
+        if title and title != UNTITLED:
+            updates['title'] = title
+            updates['title_source'] = TITLE_SOURCE_USER
+        self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=updates,
+            points=models.FilterSelector(filter=models.Filter(
+                should=[
+                    models.HasIdCondition(has_id=[doc_id]),
+                    models.FieldCondition(key="parent_id", match=models.MatchValue(value=doc_id)),
                 ]
+            ))
+        )
+        self._bump_revision()
+        self.stats_store.record_deleted([duplicate['payload']])
+        self.stats_store.record_added([metadata])
+        logger.info(f"Updated metadata of duplicate document {doc_id}")
+
+    def _embed_chunks(self, texts):
+        """Return dense vectors for chunk texts, replaying stored embeddings where available."""
+        if self.embedding_store is None:
+            return self.embedder.embed_documents(texts)
+        return self.embedding_store.embed_documents(self.embedder, texts)
+
+    def _embed_sparse(self, texts):
+        """Return sparse vectors for texts, or None when the collection has no sparse vectors."""
+        if not self.has_sparse_vectors:
+            return None
+        return self.sparse_embedder.embed_documents(texts)
+
+    def _build_points(self, doc_id, chunks, vectors, metadata, sparse_vectors=None):
+        """Build one point per chunk, each carrying the document metadata and only its own text."""
+        points = []
+        for chunk_index, (chunk, vector) in enumerate(zip(chunks, vectors)):
+            point_vectors = {DENSE_VECTOR_NAME: vector}
+            if sparse_vectors is not None:
+                indices, values = sparse_vectors[chunk_index]
+                point_vectors[SPARSE_VECTOR_NAME] = models.SparseVector(indices=indices, values=values)
+            if chunk_index == 0:
+                payload = dict(metadata)
+            else:
+                payload = {k: v for k, v in metadata.items() if k not in DOCUMENT_ONLY_PAYLOAD_FIELDS}
+            payload.update({
+                'text': chunk['text'],
+                'parent_id': doc_id,
+                'chunk_index': chunk_index,
+                'chunk_count': len(chunks),
+                'chunk_start': chunk['start'],
+                'chunk_end': chunk['end'],
+            })
+            points.append(
+                models.PointStruct(
+                    id=chunk_point_id(doc_id, chunk_index),
+                    vector=point_vectors,
+                    payload=payload
+                )
             )
+        return points
+
+    def add_document(self, document_data, progress=None):
+        """
+        Add a document to the collection and return its ID.
+        
+        If document_data is a string, treat it as the text content.
+        If document_data is a dictionary, it should have at least a 'text' field,
+        and can optionally include metadata like 'title', 'source', etc.
+        
+        The text is split into overlapping chunks (see utils.chunking) and each
+        chunk is stored as its own point carrying the document metadata and a
+        'parent_id' pointing back to the returned document ID.
+        
+        If the content duplicates a stored document (see _find_duplicates),
+        nothing is embedded and the stored document's ID is returned.
+        
+        If given, progress(fraction, message) is called as each stage starts.
+        """
+        if progress is None:
+            progress = lambda fraction, message=None: None
+        try:
+            progress(0.1, "Preparing document")
+            doc_id, document_text, metadata = self._prepare_document(document_data)
+            
+            with span('ingest_dedup'):
+                duplicate = self._find_duplicates([(0, doc_id, metadata)]).get(0)
+            if duplicate is not None:
+                self._handle_duplicate(duplicate, metadata)
+                return duplicate['id']
+            upgrade_title = self._ensure_title(document_text, metadata)
+            
+            # Split the document into chunks and embed them with the shared model
+            chunks = chunk_text(document_text)
+            progress(0.4, f"Embedding {len(chunks)} chunks")
+            chunk_texts = [chunk['text'] for chunk in chunks]
+            with span('ingest_embed'):
+                vectors = self._embed_chunks(chunk_texts)
+                sparse_vectors = self._embed_sparse(chunk_texts)
+            points = self._build_points(doc_id, chunks, vectors, metadata, sparse_vectors)
+            
+            progress(0.8, "Storing chunks")
+            with span('ingest_upsert'):
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=points
+                )
             
-            logger.info(f"Added document with ID {doc_id}")
+            self._bump_revision()
+            self.stats_store.record_added([metadata])
+            if upgrade_title:
+                self.title_upgrader.submit(doc_id, document_text)
+            logger.info(f"Added document with ID {doc_id} as {len(points)} chunks")
             return doc_id
         except Exception as e:
             logger.error(f"Error adding document: {str(e)}")
             raise
 
-    def query(self, query_text, limit=3):
-        """Query for similar documents."""
+    def add_documents(self, documents, embed_batch_size=INGEST_EMBED_BATCH_SIZE,
+                      upsert_batch_size=INGEST_UPSERT_BATCH_SIZE, parallel=INGEST_PARALLEL):
+        """
+        Add many documents to the collection.
+        
+        Chunks from all documents are embedded in batches of embed_batch_size,
+        then upserted in batches of up to upsert_batch_size points using
+        `parallel` concurrent uploads. A document's chunks are never split
+        across upsert batches, so a failed batch only fails its own documents.
+        
+        Args:
+            documents (list): Items accepted by add_document (str, bytes or dict)
+            embed_batch_size (int, optional): Chunks per embedding call
+            upsert_batch_size (int, optional): Points per upsert request
+            parallel (int, optional): Number of concurrent upsert requests
+        
+        Returns:
+            list: One result per input document, in order, with 'index',
+                  'success' and either 'id' or 'error'. Documents that duplicate
+                  a stored or earlier document in the batch are not embedded;
+                  their result has 'duplicate': True and the existing 'id'.
+        """
+        results = [None] * len(documents)
+        candidates = []
+        
+        # Prepare every document, recording failures individually
+        for index, document_data in enumerate(documents):
+            try:
+                candidates.append((index, *self._prepare_document(document_data)))
+            except Exception as e:
+                logger.warning(f"Skipping document {index}: {str(e)}")
+                results[index] = {"index": index, "success": False, "error": str(e)}
+        
+        # Skip duplicates of stored documents and of earlier documents in the batch
         try:
-            from fastembed import TextEmbedding
-            
-            # Initialize the embedding model
-            embedding_model = TextEmbedding(model_name="BAAI/bge-base-en-v1.5")
-            
-            # Generate the embedding for the query text
-            embeddings = list(embedding_model.embed([query_text]))
-            query_vector = embeddings[0].tolist()
+            with span('ingest_dedup'):
+                duplicates = self._find_duplicates([(index, doc_id, metadata) for index, doc_id, _, metadata in candidates])
+        except Exception as e:
+            # Without the lookup every document might be a duplicate, so none are stored
+            logger.error(f"Error checking {len(candidates)} documents for duplicates: {str(e)}")
+            for index, _, _, _ in candidates:
+                results[index] = {"index": index, "success": False, "error": str(e)}
+            candidates = []
+            duplicates = {}
+        prepared = []
+        upgrade_titles = {}
+        seen_ids = set()
+        seen_bands = {}
+        for index, doc_id, document_text, metadata in candidates:
+            duplicate = duplicates.get(index)
+            if duplicate is None and doc_id in seen_ids:
+                duplicate = {"id": doc_id, "exact": True, "similarity": 1.0}
+            if duplicate is None and self.dedup_mode == 'near':
+                for band in metadata['minhash_bands']:
+                    other_id, other_signature = seen_bands.get(band, (None, None))
+                    similarity = estimate_similarity(metadata['minhash'], other_signature) if other_id else 0.0
+                    if similarity >= NEAR_DUPLICATE_THRESHOLD:
+                        duplicate = {"id": other_id, "exact": False, "similarity": similarity}
+                        break
+            if duplicate is not None:
+                try:
+                    if 'payload' in duplicate:
+                        self._handle_duplicate(duplicate, metadata)
+                except Exception as e:
+                    logger.warning(f"Error updating duplicate of document {index}: {str(e)}")
+                    results[index] = {"index": index, "success": False, "id": duplicate['id'], "error": str(e)}
+                    continue
+                results[index] = {"index": index, "success": True, "id": duplicate['id'], "duplicate": True}
+                continue
             
-            # Search using the vector directly
-            search_result = self.client.search(
+            seen_ids.add(doc_id)
+            if self.dedup_mode == 'near':
+                for band in metadata['minhash_bands']:
+                    seen_bands.setdefault(band, (doc_id, metadata['minhash']))
+            try:
+                if self._ensure_title(document_text, metadata):
+                    upgrade_titles[index] = document_text
+                prepared.append((index, doc_id, chunk_text(document_text), metadata))
+            except Exception as e:
+                logger.warning(f"Skipping document {index}: {str(e)}")
+                results[index] = {"index": index, "success": False, "error": str(e)}
+        
+        # Embed all chunks in fixed-size batches
+        flat_chunks = [(item, chunk) for item in prepared for chunk in item[2]]
+        vectors_by_index = {}
+        for batch_start in range(0, len(flat_chunks), embed_batch_size):
+            batch = flat_chunks[batch_start:batch_start + embed_batch_size]
+            batch_texts = [chunk['text'] for _, chunk in batch]
+            try:
+                with span('ingest_embed'):
+                    vectors = self._embed_chunks(batch_texts)
+                    sparse_vectors = self._embed_sparse(batch_texts) or [None] * len(batch)
+            except Exception as e:
+                logger.error(f"Error embedding batch at chunk {batch_start}: {str(e)}")
+                vectors = [None] * len(batch)
+                sparse_vectors = [None] * len(batch)
+            for (item, _), vector, sparse_vector in zip(batch, vectors, sparse_vectors):
+                vectors_by_index.setdefault(item[0], []).append((vector, sparse_vector))
+        
+        # Group whole documents into upsert batches
+        upsert_batches = []
+        current_batch, current_docs = [], []
+        for index, doc_id, chunks, metadata in prepared:
+            embedded = vectors_by_index.get(index, [])
+            if len(embedded) != len(chunks) or any(vector is None for vector, _ in embedded):
+                results[index] = {"index": index, "success": False, "error": "Failed to embed document"}
+                continue
+            vectors = [vector for vector, _ in embedded]
+            sparse_vectors = [sparse for _, sparse in embedded] if self.has_sparse_vectors else None
+            points = self._build_points(doc_id, chunks, vectors, metadata, sparse_vectors)
+            if current_batch and len(current_batch) + len(points) > upsert_batch_size:
+                upsert_batches.append((current_batch, current_docs))
+                current_batch, current_docs = [], []
+            current_batch.extend(points)
+            current_docs.append((index, doc_id))
+        if current_batch:
+            upsert_batches.append((current_batch, current_docs))
+        
+        def upsert_batch(batch):
+            points, batch_docs = batch
+            try:
+                with span('ingest_upsert'):
+                    self.client.upsert(collection_name=self.collection_name, points=points)
+                return [{"index": index, "success": True, "id": doc_id} for index, doc_id in batch_docs]
+            except Exception as e:
+                logger.error(f"Error upserting batch of {len(points)} points: {str(e)}")
+                return [{"index": index, "success": False, "error": str(e)} for index, _ in batch_docs]
+        
+        with ThreadPoolExecutor(max_workers=max(1, parallel)) as executor:
+            for batch_results in executor.map(upsert_batch, upsert_batches):
+                for result in batch_results:
+                    results[result['index']] = result
+        
+        added = [result for result in results if result['success'] and not result.get('duplicate')]
+        if added:
+            self._bump_revision()
+            metadata_by_index = {item[0]: item[3] for item in prepared}
+            self.stats_store.record_added([metadata_by_index[result['index']] for result in added])
+            for result in added:
+                if result['index'] in upgrade_titles:
+                    self.title_upgrader.submit(result['id'], upgrade_titles[result['index']])
+        duplicate_count = sum(1 for result in results if result.get('duplicate'))
+        logger.info(
+            f"Added {len(added)} of {len(documents)} documents in {len(upsert_batches)} upsert batches, "
+            f"skipping {duplicate_count} duplicates"
+        )
+        return results
+
+    def search(self, query_text, limit=3, hybrid=False, candidates=HYBRID_CANDIDATES):
+        """
+        Search for the chunks most similar to a query.
+        
+        Dense search ranks chunks by embedding similarity. Hybrid search also
+        runs a sparse (BM25) search, which catches exact terms such as drug
+        names, diagnostic codes and acronyms, and merges both candidate lists
+        (`candidates` each) with reciprocal rank fusion. Hybrid falls back to
+        dense search if the collection has no sparse vectors.
+        
+        Returns:
+            list: Scored points, best first
+        """
+        # Generate the embedding for the query text (cached across requests)
+        query_vector = self.embed_query(query_text)
+        
+        if hybrid and not self.has_sparse_vectors:
+            logger.warning("Hybrid search requested but the collection has no sparse vectors; using dense search")
+            hybrid = False
+        
+        if hybrid:
+            with span('embed'):
+                indices, values = self.sparse_embedder.embed_query(query_text)
+            with span('vector_search'):
+                return self.client.query_points(
+                    collection_name=self.collection_name,
+                    prefetch=[
+                        models.Prefetch(query=query_vector, using=DENSE_VECTOR_NAME, limit=candidates),
+                        models.Prefetch(
+                            query=models.SparseVector(indices=indices, values=values),
+                            using=SPARSE_VECTOR_NAME,
+                            limit=candidates
+                        ),
+                    ],
+                    query=models.FusionQuery(fusion=models.Fusion.RRF),
+                    limit=limit,
+                    with_payload=True
+                ).points
+        
+        with span('vector_search'):
+            return self.client.query_points(
                 collection_name=self.collection_name,
-                query_vector=("fast-bge-base-en-v1.5", query_vector),
-                limit=limit
-            )
+                query=query_vector,
+                using=DENSE_VECTOR_NAME,
+                limit=limit,
+                with_payload=True
+            ).points
+
+    def query(self, query_text, limit=RERANK_TOP_K, hybrid=False, rerank_candidates=RERANK_CANDIDATES,
+              token_budget=RERANK_TOKEN_BUDGET, raise_errors=False):
+        """
+        Query for similar documents and return their text.
+        
+        When a reranker is configured, `rerank_candidates` chunks are fetched,
+        rescored against the query by the reranker, and the best `limit` that
+        fit within `token_budget` (estimated tokens) are returned. Search and
+        rerank latencies are logged so the candidate count can be tuned.
+        
+        A failed search returns an empty list, or raises when raise_errors is
+        True so callers such as /api/chat can report the source as failed.
+        """
+        try:
+            reranker = self.reranker
+            fetch_limit = max(limit, rerank_candidates) if reranker is not None else limit
+            start = time.perf_counter()
+            search_result = self.search(query_text, limit=fetch_limit, hybrid=hybrid)
+            search_ms = (time.perf_counter() - start) * 1000
             
             # Process the results
             documents = []
@@ -206,10 +865,28 @@ class QdrantService:
                     # If no payload, return the vector ID
                     documents.append(f"Document {result.id}")
             
-            logger.info(f"Retrieved {len(documents)} documents for query: {query_text[:50]}...")
+            if reranker is None:
+                logger.info(f"Retrieved {len(documents)} documents in {search_ms:.1f}ms for query: {query_text[:50]}...")
+                return documents
+            
+            try:
+                with span('rerank'):
+                    documents, scores, rerank_ms = rerank(
+                        reranker, query_text, documents, top_k=limit, token_budget=token_budget
+                    )
+            except Exception as e:
+                # Fall back to retrieval order rather than losing the context
+                logger.error(f"Error reranking documents, using retrieval order: {str(e)}")
+                return documents[:limit]
+            logger.info(
+                f"Retrieved {len(search_result)} candidates in {search_ms:.1f}ms and kept {len(documents)} "
+                f"after reranking in {rerank_ms:.1f}ms for query: {query_text[:50]}..."
+            )
             return documents
         except Exception as e:
             logger.error(f"Error querying documents: {str(e)}")
+            if raise_errors:
+                raise
             return []
 
     def get_collection_info(self):
@@ -220,48 +897,187 @@ class QdrantService:
             logger.error(f"Error getting collection info: {str(e)}")
             raise
     
-    def list_documents(self, limit=100, offset=0):
-        """List all documents in the collection with their metadata."""
+    def list_documents_page(self, limit=10, cursor=None, payload_fields=LISTING_PAYLOAD_FIELDS):
+        """
+        List one page of documents, newest first, using keyset pagination.
+        
+        Documents are ordered by their 'timestamp' payload (backed by a datetime
+        payload index), and each page starts where the previous one ended, so
+        fetching a page costs the same however deep it is.
+        
+        Args:
+            limit (int, optional): Documents per page
+            cursor (str, optional): The 'next_cursor' of the previous page
+            payload_fields (list, optional): Payload fields to return
+        
+        Returns:
+            dict: 'documents' and 'next_cursor' (None on the last page)
+        """
         try:
-            # Get the points (documents) from the collection
-            points = self.client.scroll(
+            position = decode_cursor(cursor) if cursor else None
+            skip_ids = set(position['skip']) if position else set()
+            
+            # start_from is inclusive, so over-fetch by the IDs already shown at the boundary timestamp
+            points, _ = self.client.scroll(
                 collection_name=self.collection_name,
-                limit=limit,
-                offset=offset,
-                with_payload=True,
+                scroll_filter=document_filter(),
+                limit=limit + len(skip_ids) + 1,
+                order_by=models.OrderBy(
+                    key="timestamp",
+                    direction=models.Direction.DESC,
+                    start_from=position['timestamp'] if position else None
+                ),
+                with_payload=payload_fields if payload_fields is not None else True,
                 with_vectors=False
-            )[0]  # The scroll method returns a tuple (points, next_page_offset)
+            )
+            points = [point for point in points if str(point.id) not in skip_ids]
+            page = points[:limit]
             
-            # Format the results
-            documents = []
-            for point in points:
-                doc_id = point.id
-                payload = point.payload
-                
-                # We need to return the full payload for the frontend to properly display documents
-                documents.append({
-                    "id": doc_id,
-                    "payload": payload
-                })
+            next_cursor = None
+            if len(points) > limit:
+                last_timestamp = page[-1].payload.get('timestamp')
+                boundary_ids = [str(point.id) for point in page if point.payload.get('timestamp') == last_timestamp]
+                if position and position['timestamp'] == last_timestamp:
+                    boundary_ids.extend(skip_ids)
+                next_cursor = encode_cursor({"timestamp": last_timestamp, "skip": boundary_ids})
             
-            logger.info(f"Retrieved {len(documents)} documents from collection")
-            return documents
+            documents = [{"id": point.id, "payload": point.payload} for point in page]
+            logger.info(f"Retrieved page of {len(documents)} documents from collection")
+            return {"documents": documents, "next_cursor": next_cursor}
         except Exception as e:
-            logger.error(f"Error listing documents: {str(e)}")
-            return []
-    
-    def delete_document(self, doc_id):
-        """Delete a document from the collection by ID."""
+            logger.error(f"Error listing documents page: {str(e)}")
+            raise
+
+    def count_documents(self):
+        """
+        Return the number of documents.
+        
+        Counted exactly by Qdrant over the indexed chunk_index field, so every
+        instance writing to the collection agrees without scanning payloads.
+        """
+        return self.client.count(
+            collection_name=self.collection_name,
+            count_filter=document_filter(),
+            exact=True
+        ).count
+
+    def get_document(self, doc_id):
+        """
+        Get a single document with its full text, reassembled from its chunks.
+        
+        Returns:
+            dict: 'id', 'payload' (document metadata) and 'text', or None if
+                  the document doesn't exist
+        """
         try:
-            self.client.delete(
-                collection_name=self.collection_name,
-                points_selector=models.PointIdsList(points=[doc_id])
-            )
-            logger.info(f"Deleted document with ID {doc_id}")
-            return True
+            points = []
+            offset = None
+            while True:
+                page, offset = self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=models.Filter(
+                        should=[
+                            models.HasIdCondition(has_id=[doc_id]),
+                            models.FieldCondition(key="parent_id", match=models.MatchValue(value=str(doc_id))),
+                        ]
+                    ),
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False
+                )
+                points.extend(page)
+                if offset is None:
+                    break
+            
+            if not points:
+                return None
+            
+            payloads = [point.payload or {} for point in points]
+            if 'chunk_start' in payloads[0]:
+                text = join_chunks([
+                    {"text": p.get('text', ''), "start": p['chunk_start'], "end": p['chunk_end']}
+                    for p in payloads
+                ])
+            else:
+                # Legacy documents keep their whole text in a single point
+                text = payloads[0].get('text', '')
+            
+            metadata = {
+                k: v for k, v in payloads[0].items()
+                if k not in CHUNK_PAYLOAD_FIELDS and k not in DOCUMENT_ONLY_PAYLOAD_FIELDS
+            }
+            return {"id": doc_id, "payload": metadata, "text": text}
         except Exception as e:
-            logger.error(f"Error deleting document with ID {doc_id}: {str(e)}")
-            return False
+            logger.error(f"Error getting document with ID {doc_id}: {str(e)}")
+            raise
+    
+    def delete_document(self, doc_id):
+        """Delete a document and all of its chunks from the collection by ID."""
+        return self.delete_documents([doc_id])[0]['success']
+    
+    def delete_documents(self, doc_ids, batch_size=DELETE_BATCH_SIZE):
+        """
+        Delete many documents, and all of their chunks, in as few requests as possible.
+        
+        IDs are processed in batches of batch_size; each batch costs one
+        retrieve (for the statistics) and one filtered delete, regardless of
+        how many chunks the documents have. IDs that are not UUIDs cannot name
+        a document, so they are reported as not found without being sent
+        (Qdrant would reject the whole batch).
+        
+        Args:
+            doc_ids (list): IDs of the documents to delete
+            batch_size (int, optional): Documents per delete request
+        
+        Returns:
+            list: One result per ID, in order, with 'id', 'success' and a
+                  'status' of 'deleted', 'not_found' or 'error' (plus 'error')
+        """
+        results = []
+        for batch_start in range(0, len(doc_ids), batch_size):
+            requested = [str(doc_id) for doc_id in doc_ids[batch_start:batch_start + batch_size]]
+            batch = [doc_id for doc_id in requested if is_document_id(doc_id)]
+            if not batch:
+                results.extend({"id": doc_id, "success": True, "status": "not_found"} for doc_id in requested)
+                continue
+            try:
+                # Fetch the fields the statistics depend on before the documents are gone
+                existing = self.client.retrieve(
+                    collection_name=self.collection_name,
+                    ids=batch,
+                    with_payload=STATS_PAYLOAD_FIELDS,
+                    with_vectors=False
+                )
+                
+                self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.FilterSelector(
+                        filter=models.Filter(
+                            should=[
+                                models.HasIdCondition(has_id=batch),
+                                models.FieldCondition(key="parent_id", match=models.MatchAny(any=batch)),
+                            ]
+                        )
+                    )
+                )
+                self._bump_revision()
+                self.stats_store.record_deleted([point.payload or {} for point in existing])
+                
+                existing_ids = {str(point.id) for point in existing}
+                for doc_id in requested:
+                    status = 'deleted' if doc_id in existing_ids else 'not_found'
+                    results.append({"id": doc_id, "success": True, "status": status})
+                logger.info(f"Deleted {len(existing_ids)} documents in one request ({len(requested)} requested)")
+            except Exception as e:
+                logger.error(f"Error deleting batch of {len(batch)} documents: {str(e)}")
+                sent = set(batch)
+                for doc_id in requested:
+                    if doc_id in sent:
+                        results.append({"id": doc_id, "success": False, "status": "error", "error": str(e)})
+                    else:
+                        results.append({"id": doc_id, "success": True, "status": "not_found"})
+        return results
     
     def delete_all_documents(self):
         """Delete all documents from the collection."""
@@ -274,20 +1090,53 @@ class QdrantService:
                 collection_name=self.collection_name,
                 points_selector=models.FilterSelector(filter=filter_all)
             )
+            self._bump_revision()
+            self.stats_store.reset()
             logger.info(f"Deleted all documents from collection {self.collection_name}")
             return True
         except Exception as e:
             logger.error(f"Error deleting all documents: {str(e)}")
             return False
             
+    def rebuild_stats(self):
+        """
+        Recompute the collection statistics from scratch.
+        
+        Scrolls every document's size and source type (not its text) and
+        replaces the stored counters. Needed once for collections that predate
+        the statistics store, or to repair drift.
+        """
+        documents = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=document_filter(),
+                limit=1000,
+                offset=offset,
+                with_payload=STATS_PAYLOAD_FIELDS,
+                with_vectors=False
+            )
+            documents.extend(point.payload or {} for point in points)
+            if offset is None:
+                break
+        self.stats_store.reset(documents)
+        logger.info(f"Rebuilt statistics for {len(documents)} documents in collection {self.collection_name}")
+
     def get_collection_stats(self):
-        """Get statistics about the collection."""
+        """
+        Get statistics about the collection.
+        
+        The document count comes from Qdrant and sizes from the incrementally
+        maintained statistics store, so this does not scan the collection.
+        """
         try:
             # Get the collection info
             collection_info = self.client.get_collection(self.collection_name)
             
-            # Get the count of vectors/points in the collection
-            count_result = self.client.count(collection_name=self.collection_name)
+            if not self.stats_store.is_initialized():
+                self.rebuild_stats()
+            document_stats = self.stats_store.get()
             
             # Safe extraction of vector size
             vector_size = VECTOR_SIZE  # Default size from config
@@ -311,10 +1160,13 @@ class QdrantService:
             
             stats = {
                 "name": self.collection_name,
-                "vectors_count": getattr(count_result, 'count', 0),
+                "vectors_count": self.count_documents(),
                 "status": getattr(collection_info, 'status', 'unknown'),
                 "vector_size": vector_size,
                 "distance": vector_distance,
+                "total_size": document_stats['total_size'],
+                "source_types": document_stats['source_types'],
+                "hybrid_search": self.has_sparse_vectors,
             }
             
             return stats
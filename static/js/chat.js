@@ -78,6 +78,7 @@ async function handleChatSubmit(event) {
     // Get search toggle states
     const useKnowledgeSearch = document.getElementById('knowledge-search-toggle')?.checked || false;
     const useWebSearch = document.getElementById('web-search-toggle')?.checked || false;
+    const useHybridSearch = document.getElementById('hybrid-search-toggle')?.checked || false;
     
     // Add user message to UI
     addMessageToUI(message, 'user');
@@ -89,29 +90,14 @@ async function handleChatSubmit(event) {
     showLoading('chat-loading');
     
     try {
-        // Make API request
-        const response = await fetch('/api/chat', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                message: message,
-                use_knowledge_search: useKnowledgeSearch,
-                use_web_search: useWebSearch
-            })
+        // Stream the response so tokens appear as soon as they are generated
+        await streamChatResponse({
+            message: message,
+            use_knowledge_search: useKnowledgeSearch,
+            use_web_search: useWebSearch,
+            use_hybrid_search: useHybridSearch
         });
         
-        if (!response.ok) {
-            const errorData = await response.json();
-            throw new Error(errorData.error || 'Failed to get response');
-        }
-        
-        const data = await response.json();
-        
-        // Add AI response to UI
-        addMessageToUI(data.response, 'ai', data.citations);
-        
     } catch (error) {
         console.error('Error in chat:', error);
         
@@ -124,6 +110,81 @@ async function handleChatSubmit(event) {
     }
 }
 
+// Request a chat response over server-sent events and render it incrementally
+async function streamChatResponse(payload) {
+    const response = await fetch('/api/chat/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(payload)
+    });
+    
+    if (!response.ok) {
+        const errorData = await response.json();
+        throw new Error(errorData.error || 'Failed to get response');
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let citations = [];
+    let responseText = '';
+    let messageElement = null;
+    let historyEntry = null;
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const event = parseServerSentEvent(buffer.slice(0, boundary));
+            buffer = buffer.slice(boundary + 2);
+            
+            if (event.type === 'citations') {
+                citations = event.data.citations || [];
+                hideLoading('chat-loading');
+                messageElement = addMessageToUI('', 'ai', citations);
+                historyEntry = chatHistory[chatHistory.length - 1];
+            } else if (event.type === 'token') {
+                if (!messageElement) {
+                    messageElement = addMessageToUI('', 'ai', citations);
+                    historyEntry = chatHistory[chatHistory.length - 1];
+                }
+                responseText += event.data.text;
+                renderMessageContent(messageElement, responseText, citations);
+                historyEntry.message = responseText;
+                scrollToBottom();
+            } else if (event.type === 'error') {
+                throw new Error(event.data.error || 'Failed to get response');
+            }
+        }
+    }
+}
+
+// Parse a single server-sent event block into its type and JSON data
+function parseServerSentEvent(block) {
+    let type = 'message';
+    const dataLines = [];
+    
+    block.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            type = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trim());
+        }
+    });
+    
+    return {
+        type: type,
+        data: dataLines.length > 0 ? JSON.parse(dataLines.join('\n')) : {}
+    };
+}
+
 // Add a message to the UI
 function addMessageToUI(message, sender, citations = []) {
     const messagesContainer = document.getElementById('messages-container');
@@ -149,6 +210,39 @@ function addMessageToUI(message, sender, citations = []) {
     // Add message content with numbered citations
     const messageContent = document.createElement('div');
     messageContent.className = 'message-content';
+    messageElement.appendChild(messageContent);
+    renderMessageContent(messageElement, message, citations);
+    
+    // Hide citations from the message since they'll be in modal
+    
+    // Add timestamp (hidden - only used for sorting)
+    const timestamp = document.createElement('div');
+    timestamp.className = 'message-timestamp';
+    timestamp.style.display = 'none';
+    timestamp.textContent = new Date().toLocaleTimeString();
+    messageElement.appendChild(timestamp);
+    
+    // Add to messages container
+    messagesContainer.appendChild(messageElement);
+    
+    // Add to chat history
+    chatHistory.push({
+        message: message,
+        sender: sender,
+        citations: citations,
+        timestamp: new Date()
+    });
+    
+    // Scroll to bottom
+    scrollToBottom();
+    
+    return messageElement;
+}
+
+// Render (or re-render) the content of a message element
+function renderMessageContent(messageElement, message, citations = []) {
+    const messageContent = messageElement.querySelector('.message-content');
+    if (!messageContent) return;
     
     // If there are citations, format them with numbers
     if (citations && citations.length > 0) {
@@ -177,31 +271,6 @@ function addMessageToUI(message, sender, citations = []) {
     } else {
         messageContent.innerHTML = formatMessage(message);
     }
-    
-    messageElement.appendChild(messageContent);
-    
-    // Hide citations from the message since they'll be in modal
-    
-    // Add timestamp (hidden - only used for sorting)
-    const timestamp = document.createElement('div');
-    timestamp.className = 'message-timestamp';
-    timestamp.style.display = 'none';
-    timestamp.textContent = new Date().toLocaleTimeString();
-    messageElement.appendChild(timestamp);
-    
-    // Add to messages container
-    messagesContainer.appendChild(messageElement);
-    
-    // Add to chat history
-    chatHistory.push({
-        message: message,
-        sender: sender,
-        citations: citations,
-        timestamp: new Date()
-    });
-    
-    // Scroll to bottom
-    scrollToBottom();
 }
 
 // Show citations in modal
@@ -5,6 +5,8 @@ let currentPage = 1;
 let totalPages = 1;
 let documentsPerPage = 5;
 let selectedDocuments = new Set();
+// Cursor that starts each page we have reached so far (page 1 starts with no cursor)
+let pageCursors = [null];
 
 function initializeCollectionView() {
     // Load initial documents and stats
@@ -44,6 +46,14 @@ async function loadCollectionStats() {
             storageSizeElement.innerHTML = `<i class="fas fa-database"></i> ${stats.total_size_formatted || '0 KB'}`;
         }
         
+        // Collections created without sparse vectors can't match exact terms
+        const hybridToggle = document.getElementById('hybrid-search-toggle');
+        if (hybridToggle && stats.hybrid_search === false) {
+            hybridToggle.checked = false;
+            hybridToggle.disabled = true;
+            hybridToggle.closest('.toggle-checkbox').dataset.tooltip = 'Not available for this collection';
+        }
+        
     } catch (error) {
         console.error('Error loading collection stats:', error);
     }
@@ -51,11 +61,33 @@ async function loadCollectionStats() {
 
 // Load documents from the API
 async function loadDocuments(page = 1) {
+    // Reloading the first page starts a fresh walk through the collection
+    if (page === 1) {
+        pageCursors = [null];
+    }
+    
+    // We can only jump to pages whose starting cursor we already know
+    if (pageCursors[page - 1] === undefined) {
+        return;
+    }
+    
     currentPage = page;
     showLoading('collection-loading');
     
     try {
-        const data = await fetchWithErrorHandling(`/api/get-documents?page=${page}&per_page=${documentsPerPage}`);
+        let url = `/api/get-documents?per_page=${documentsPerPage}`;
+        const cursor = pageCursors[page - 1];
+        if (cursor) {
+            url += `&cursor=${encodeURIComponent(cursor)}`;
+        }
+        const data = await fetchWithErrorHandling(url);
+        
+        // Remember where the next page starts
+        if (data.next_cursor) {
+            pageCursors[page] = data.next_cursor;
+        } else {
+            pageCursors.length = page;
+        }
         
         // Update total pages
         totalPages = data.total_pages || 1;
@@ -127,6 +159,9 @@ function renderDocuments(documents) {
                     <h3 class="card-title">${title}</h3>
                 </div>
                 <div class="card-actions">
+                    <button class="card-action view-doc-btn" title="Show full text">
+                        <i class="fas fa-eye"></i>
+                    </button>
                     <button class="card-action delete-doc-btn" title="Delete document">
                         <i class="fas fa-trash"></i>
                     </button>
@@ -160,6 +195,13 @@ function renderDocuments(documents) {
             });
         }
         
+        const viewButton = card.querySelector('.view-doc-btn');
+        if (viewButton) {
+            viewButton.addEventListener('click', function() {
+                toggleFullText(doc.id, card, preview);
+            });
+        }
+        
         const deleteButton = card.querySelector('.delete-doc-btn');
         if (deleteButton) {
             deleteButton.addEventListener('click', function() {
@@ -182,6 +224,27 @@ function renderDocuments(documents) {
     });
 }
 
+// Toggle a card between its preview and the document's full text, fetched on demand
+async function toggleFullText(docId, card, preview) {
+    const previewElement = card.querySelector('.card-preview');
+    if (!previewElement) return;
+    
+    if (card.classList.contains('expanded')) {
+        card.classList.remove('expanded');
+        previewElement.innerHTML = preview;
+        return;
+    }
+    
+    try {
+        const data = await fetchWithErrorHandling(`/api/documents/${docId}`);
+        card.classList.add('expanded');
+        previewElement.textContent = data.text;
+    } catch (error) {
+        console.error('Error loading document:', error);
+        showAlert(error.message || 'Failed to load document', 'error', 'collection-alerts');
+    }
+}
+
 // Render pagination controls
 function renderPagination() {
     const paginationContainer = document.getElementById('pagination-container');
@@ -229,7 +292,10 @@ function renderPagination() {
         pageLink.textContent = i;
         pageLink.href = '#';
         
-        if (i !== currentPage) {
+        // Pages beyond the furthest one reached have no known cursor yet
+        if (pageCursors[i - 1] === undefined) {
+            pageItem.classList.add('disabled');
+        } else if (i !== currentPage) {
             pageLink.addEventListener('click', function(e) {
                 e.preventDefault();
                 loadDocuments(i);
@@ -242,14 +308,15 @@ function renderPagination() {
     
     // Next button
     const nextItem = document.createElement('li');
-    nextItem.className = `page-item ${currentPage === totalPages ? 'disabled' : ''}`;
+    const hasNextPage = pageCursors[currentPage] !== undefined;
+    nextItem.className = `page-item ${hasNextPage ? '' : 'disabled'}`;
     
     const nextLink = document.createElement('a');
     nextLink.className = 'page-link';
     nextLink.innerHTML = '&raquo;';
     nextLink.href = '#';
     
-    if (currentPage < totalPages) {
+    if (hasNextPage) {
         nextLink.addEventListener('click', function(e) {
             e.preventDefault();
             loadDocuments(currentPage + 1);
@@ -176,6 +176,31 @@ function formatFileSize(bytes) {
     }
 }
 
+// Poll a background job until it finishes, reporting progress along the way
+async function waitForJob(jobId, onProgress, intervalMs = 1000) {
+    while (true) {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        const job = await response.json();
+        
+        if (!response.ok) {
+            throw new Error(job.error || `HTTP error: ${response.status}`);
+        }
+        
+        if (job.status === 'succeeded') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Background job failed');
+        }
+        
+        if (onProgress) {
+            onProgress(job.progress || 0, job.message);
+        }
+        
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
 // Generic fetch function with error handling and loading effects
 async function fetchWithErrorHandling(url, options = {}) {
     // Add fancy loading effect to the page during fetch
@@ -58,6 +58,7 @@ async function extractContent() {
         // Create FormData object
         const formData = new FormData();
         formData.append('source_type', sourceType);
+        formData.append('async', 'true');
         
         // Add file or URL based on source type
         if (sourceType === 'text' || sourceType === 'pdf' || sourceType === 'audio' || sourceType === 'image') {
@@ -89,7 +90,9 @@ async function extractContent() {
             throw new Error(errorData.error || 'Failed to extract content');
         }
         
-        const data = await response.json();
+        // Extraction runs as a background job unless the result was cached; poll until it finishes
+        const job = await response.json();
+        const data = job.job_id ? await waitForJob(job.job_id, updateUploadProgress) : job;
         
         // Update content preview
         if (contentPreview) {
@@ -121,6 +124,7 @@ async function extractContent() {
     } finally {
         // Hide loading indicator
         hideLoading('upload-loading');
+        updateUploadProgress(0, null);
     }
 }
 
@@ -155,9 +159,10 @@ async function storeDocument() {
         // Prepare document data
         const documentData = {
             text: contentPreview.value,
-            title: titleInput ? titleInput.value : 'Untitled Document',
+            title: titleInput ? titleInput.value.trim() : '',
             source_type: sourceType,
-            source: source
+            source: source,
+            async: true
         };
         
         // Make API request to store document
@@ -174,7 +179,9 @@ async function storeDocument() {
             throw new Error(errorData.error || 'Failed to store document');
         }
         
-        const data = await response.json();
+        // Storage runs as a background job; poll until it finishes
+        const job = await response.json();
+        const data = await waitForJob(job.job_id, updateUploadProgress);
         
         // Clear form
         contentPreview.value = '';
@@ -200,5 +207,18 @@ async function storeDocument() {
     } finally {
         // Hide loading indicator
         hideLoading('upload-loading');
+        updateUploadProgress(0, null);
     }
 }
+
+// Show background job progress in the upload loading indicator
+function updateUploadProgress(progress, message) {
+    const label = document.querySelector('#upload-loading p');
+    if (!label) return;
+    
+    if (!message) {
+        label.textContent = 'Processing content...';
+        return;
+    }
+    label.textContent = `${message} (${Math.round(progress * 100)}%)`;
+}
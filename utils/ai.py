@@ -1,11 +1,11 @@
 import logging
-import requests
 import json
 import os
-from config import GOOGLE_API_KEY
+from config import GOOGLE_API_KEY, GEMINI_API_BASE, GEMINI_MODEL
+from utils.http import get_session
+from utils.context import build_context
+from utils.metrics import span
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Load prompt templates
@@ -23,6 +23,22 @@ def load_prompt_template(template_name):
         logger.error(f"Error loading prompt template: {str(e)}")
         return None
 
+GEMINI_MODEL_URL = f"{GEMINI_API_BASE}/v1beta/models/{GEMINI_MODEL}"
+
+def extract_response_text(response_json, default=''):
+    """
+    Extract the generated text from a Gemini generateContent response.
+    
+    Gemini returns the answer under candidates[0].content.parts; all text
+    parts are concatenated.
+    """
+    candidates = response_json.get('candidates') or []
+    if not candidates:
+        return default
+    parts = candidates[0].get('content', {}).get('parts', [])
+    text = ''.join(part.get('text', '') for part in parts)
+    return text if text else default
+
 def generate_title_for_content(content):
     """
     Generate a title for the given content using Gemini API.
@@ -47,9 +63,6 @@ def generate_title_for_content(content):
         Title:
         """
         
-        # Define the API endpoint
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-        
         # Prepare the request payload
         payload = {
             "contents": [{
@@ -58,17 +71,18 @@ def generate_title_for_content(content):
         }
         
         # Make the POST request
-        response = requests.post(url, params={'key': GOOGLE_API_KEY}, json=payload)
+        with span('title_generation'):
+            response = get_session().post(f"{GEMINI_MODEL_URL}:generateContent", params={'key': GOOGLE_API_KEY}, json=payload)
         
         # Check for successful response
         if response.status_code == 200:
-            title = response.json().get('contents', [{}])[0].get('parts', [{}])[0].get('text', '').strip()
+            title = extract_response_text(response.json()).strip()
             
             # If title is too long, truncate it
             if len(title) > 100:
                 title = title[:97] + "..."
                 
-            return title
+            return title or "Untitled Document"
         else:
             logger.error(f"Error generating title: {response.text}")
             return "Untitled Document"
@@ -77,6 +91,129 @@ def generate_title_for_content(content):
         logger.error(f"Error generating title: {str(e)}")
         return "Untitled Document"
 
+def generate_titles_for_contents(contents):
+    """
+    Generate titles for many documents with a single Gemini request.
+    
+    Args:
+        contents (list): The contents to title
+    
+    Returns:
+        list: One title per content, or None where no title could be generated
+    
+    Raises:
+        Exception: If the request fails
+    """
+    # Keep each preview short so a whole batch fits in one small prompt
+    previews = [content[:300] + "..." if len(content) > 300 else content for content in contents]
+    numbered = '\n\n'.join(f"Document {i + 1}:\n{preview}" for i, preview in enumerate(previews))
+    prompt = f"""
+    Generate a concise, descriptive title for each of the following documents.
+    Each title should be 5-10 words and accurately reflect the document's main topic.
+    Respond with a JSON array of {len(previews)} strings, one title per document, in order.
+    
+    {numbered}
+    """
+    
+    payload = {
+        "contents": [{
+            "parts": [{"text": prompt}]
+        }],
+        "generationConfig": {"responseMimeType": "application/json"}
+    }
+    
+    with span('title_generation'):
+        response = get_session().post(f"{GEMINI_MODEL_URL}:generateContent", params={'key': GOOGLE_API_KEY}, json=payload)
+    if response.status_code != 200:
+        raise Exception(f"Title request failed: {response.status_code}, {response.text}")
+    
+    titles = json.loads(extract_response_text(response.json(), default='[]'))
+    if not isinstance(titles, list) or len(titles) != len(contents):
+        raise Exception(f"Expected {len(contents)} titles, got {titles!r:.200}")
+    
+    results = []
+    for title in titles:
+        title = str(title).strip() if title else ''
+        if len(title) > 100:
+            title = title[:97] + "..."
+        results.append(title or None)
+    return results
+
+@span('prompt_build')
+def build_chat_prompt(user_query, knowledge_results=None, web_results=None):
+    """
+    Build the Gemini prompt and citation list for a chat message.
+    
+    Args:
+        user_query (str): The user's question
+        knowledge_results (list, optional): Results from the knowledge base. Defaults to None.
+        web_results (list, optional): Results from web search. Defaults to None.
+    
+    Returns:
+        tuple: (prompt, citations, context_report) where context_report describes
+               the passages trimmed or dropped to fit the context token budget
+    """
+    # Dedupe the results and fit them into the context token budget
+    knowledge_results, web_results, context_report = build_context(knowledge_results, web_results)
+    
+    # Prepare context from knowledge base and web search results
+    context_parts = []
+    citations = []
+    
+    # Add knowledge base results to context
+    if knowledge_results and len(knowledge_results) > 0:
+        context_parts.append("Information from Knowledge Base:")
+        for i, result in enumerate(knowledge_results):
+            context_parts.append(f"[KB{i+1}]: {result}")
+            citations.append({
+                "id": f"KB{i+1}",
+                "text": result[:150] + "..." if len(result) > 150 else result,
+                "source": "Knowledge Base"
+            })
+    
+    # Add web search results to context
+    if web_results and len(web_results) > 0:
+        context_parts.append("Information from Web Search:")
+        for i, result in enumerate(web_results):
+            context_parts.append(f"[WEB{i+1}]: {result}")
+            # Extract source information for citation
+            source_start = result.rfind("[Source: ")
+            source_text = result[source_start:] if source_start > -1 else "[Source: Web]"
+            citations.append({
+                "id": f"WEB{i+1}",
+                "text": result[:150] + "..." if len(result) > 150 else result,
+                "source": source_text
+            })
+    
+    # Prepare the prompt for Gemini
+    context_text = '\n'.join(context_parts) if context_parts else 'No additional context provided.'
+    
+    # Load the chat response template
+    template = load_prompt_template('chat_response')
+    if template:
+        instructions = template
+    else:
+        # Fallback to hardcoded instructions if template isn't found
+        instructions = """
+        Instructions:
+        1. Answer the user's query based on the provided information and your knowledge
+        2. If the context information is relevant, incorporate it and cite the source using the format [KB1], [WEB1], etc.
+        3. If you don't have relevant information, just answer to the best of your ability
+        4. Be concise and clear in your response
+        5. Format the answer in a way that's easy to read
+        6. Do not include timestamps or date information in your responses
+        """
+        
+    prompt = f"""
+    User Query: {user_query}
+    
+    {context_text}
+    
+    {instructions}
+    """
+    
+    return prompt, citations, context_report
+
 def generate_ai_response(user_query, knowledge_results=None, web_results=None):
     """
     Generate an AI response using Gemini API, incorporating knowledge base and web search results.
@@ -87,67 +224,11 @@ def generate_ai_response(user_query, knowledge_results=None, web_results=None):
         web_results (list, optional): Results from web search. Defaults to None.
     
     Returns:
-        dict: Dictionary containing the AI response and citations
+        dict: Dictionary containing the AI response, citations and context report,
+              plus an 'error' flag that is True when no answer could be generated
     """
     try:
-        # Prepare context from knowledge base and web search results
-        context_parts = []
-        citations = []
-        
-        # Add knowledge base results to context
-        if knowledge_results and len(knowledge_results) > 0:
-            context_parts.append("Information from Knowledge Base:")
-            for i, result in enumerate(knowledge_results):
-                context_parts.append(f"[KB{i+1}]: {result}")
-                citations.append({
-                    "id": f"KB{i+1}",
-                    "text": result[:150] + "..." if len(result) > 150 else result,
-                    "source": "Knowledge Base"
-                })
-        
-        # Add web search results to context
-        if web_results and len(web_results) > 0:
-            context_parts.append("Information from Web Search:")
-            for i, result in enumerate(web_results):
-                context_parts.append(f"[WEB{i+1}]: {result}")
-                # Extract source information for citation
-                source_start = result.rfind("[Source: ")
-                source_text = result[source_start:] if source_start > -1 else "[Source: Web]"
-                citations.append({
-                    "id": f"WEB{i+1}",
-                    "text": result[:150] + "..." if len(result) > 150 else result,
-                    "source": source_text
-                })
-        
-        # Prepare the prompt for Gemini
-        context_text = '\n'.join(context_parts) if context_parts else 'No additional context provided.'
-        
-        # Load the chat response template
-        template = load_prompt_template('chat_response')
-        if template:
-            instructions = template
-        else:
-            # Fallback to hardcoded instructions if template isn't found
-            instructions = """
-            Instructions:
-            1. Answer the user's query based on the provided information and your knowledge
-            2. If the context information is relevant, incorporate it and cite the source using the format [KB1], [WEB1], etc.
-            3. If you don't have relevant information, just answer to the best of your ability
-            4. Be concise and clear in your response
-            5. Format the answer in a way that's easy to read
-            6. Do not include timestamps or date information in your responses
-            """
-            
-        prompt = f"""
-        User Query: {user_query}
-        
-        {context_text}
-        
-        {instructions}
-        """
-        
-        # Define the API endpoint
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+        prompt, citations, context_report = build_chat_prompt(user_query, knowledge_results, web_results)
         
         # Prepare the request payload
         payload = {
@@ -157,18 +238,25 @@ def generate_ai_response(user_query, knowledge_results=None, web_results=None):
         }
         
         # Make the POST request
-        response = requests.post(url, params={'key': GOOGLE_API_KEY}, json=payload)
+        with span('llm'):
+            response = get_session().post(f"{GEMINI_MODEL_URL}:generateContent", params={'key': GOOGLE_API_KEY}, json=payload)
         
         # Check for successful response
         if response.status_code == 200:
-            response_text = response.json().get('contents', [{}])[0].get('parts', [{}])[0].get('text', 'I couldn\'t generate a response. Please try again.')
+            response_text = extract_response_text(response.json())
+            failed = not response_text
+            if failed:
+                response_text = "I couldn't generate a response. Please try again."
         else:
             logger.error(f"Error generating AI response: {response.text}")
             response_text = "I couldn't generate a response. Please try again."
+            failed = True
         
         return {
             "response": response_text,
-            "citations": citations
+            "citations": citations,
+            "context": context_report,
+            "error": failed
         }
     
     except Exception as e:
@@ -176,5 +264,52 @@ def generate_ai_response(user_query, knowledge_results=None, web_results=None):
         error_msg = f"I encountered an error while processing your request. Please try again. Error details: {str(e)}"
         return {
             "response": error_msg,
-            "citations": []
+            "citations": [],
+            "context": None,
+            "error": True
         }
+
+def stream_ai_response(prompt):
+    """
+    Stream an AI response from Gemini's streamGenerateContent endpoint.
+    
+    Args:
+        prompt (str): The prompt, as built by build_chat_prompt
+    
+    Yields:
+        str: Successive text fragments of the response as Gemini produces them
+    
+    Raises:
+        Exception: If the streaming request fails
+    """
+    payload = {
+        "contents": [{
+            "parts": [{"text": prompt}]
+        }]
+    }
+    
+    # The span covers the whole stream, from the request to the last fragment
+    with span('llm'):
+        response = get_session().post(
+            f"{GEMINI_MODEL_URL}:streamGenerateContent",
+            params={'key': GOOGLE_API_KEY, 'alt': 'sse'},
+            json=payload,
+            stream=True
+        )
+        
+        try:
+            if response.status_code != 200:
+                raise Exception(f"Streaming request failed: {response.status_code}, {response.text}")
+            
+            # SSE is always UTF-8, but without a charset requests would decode it as ISO-8859-1
+            response.encoding = 'utf-8'
+            
+            # Each server-sent event carries one partial generateContent response
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                text = extract_response_text(json.loads(line[len('data:'):]))
+                if text:
+                    yield text
+        finally:
+            response.close()
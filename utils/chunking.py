@@ -0,0 +1,136 @@
+import re
+import logging
+from config import CHUNK_SIZE, CHUNK_OVERLAP
+
+logger = logging.getLogger(__name__)
+
+# Paragraphs are separated by blank lines, sentences by terminal punctuation
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+def _split_spans(text, start, end, pattern):
+    """
+    Split text[start:end] at the matches of pattern.
+
+    The separators stay attached to the preceding span, so the returned spans
+    are contiguous and together cover the whole range.
+    """
+    spans = []
+    position = start
+    for match in pattern.finditer(text, start, end):
+        if match.end() > position:
+            spans.append((position, match.end()))
+            position = match.end()
+    if position < end:
+        spans.append((position, end))
+    return spans
+
+def _hard_split(text, start, end, chunk_size):
+    """Split an over-long span at whitespace, falling back to a fixed width."""
+    spans = []
+    while end - start > chunk_size:
+        cut = text.rfind(' ', start + 1, start + chunk_size)
+        if cut == -1:
+            cut = start + chunk_size
+        spans.append((start, cut))
+        start = cut
+    spans.append((start, end))
+    return spans
+
+def _split_units(text, chunk_size):
+    """Split text into sentence-sized spans that never exceed chunk_size."""
+    units = []
+    for paragraph in _split_spans(text, 0, len(text), _PARAGRAPH_BREAK):
+        for sentence in _split_spans(text, paragraph[0], paragraph[1], _SENTENCE_BREAK):
+            if sentence[1] - sentence[0] > chunk_size:
+                units.extend(_hard_split(text, sentence[0], sentence[1], chunk_size))
+            else:
+                units.append(sentence)
+    return units
+
+def chunk_spans(text, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """
+    Compute chunk boundaries for a text.
+
+    Chunks are built from whole sentences (split further only when a single
+    sentence is longer than chunk_size) and never cross more than chunk_size
+    characters. Consecutive chunks share trailing sentences of the previous
+    chunk, up to chunk_overlap characters.
+
+    Args:
+        text (str): The text to chunk
+        chunk_size (int, optional): Maximum characters per chunk. Defaults to CHUNK_SIZE.
+        chunk_overlap (int, optional): Maximum characters shared by neighbouring chunks.
+                                       Defaults to CHUNK_OVERLAP.
+
+    Returns:
+        list: List of (start, end) character offsets into text
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if not text or not text.strip():
+        return [(0, len(text))]
+
+    units = _split_units(text, chunk_size)
+    spans = []
+    i = 0
+    while i < len(units):
+        start = units[i][0]
+        j = i
+        while j + 1 < len(units) and units[j + 1][1] - start <= chunk_size:
+            j += 1
+        end = units[j][1]
+        spans.append((start, end))
+
+        if j + 1 >= len(units):
+            break
+
+        # Step back over trailing sentences that fit in the overlap window,
+        # always moving forward by at least one unit
+        k = j + 1
+        while k - 1 > i and end - units[k - 1][0] <= chunk_overlap:
+            k -= 1
+        i = k
+
+    return spans
+
+def chunk_text(text, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP):
+    """
+    Split a text into overlapping chunks.
+
+    Args:
+        text (str): The text to chunk
+        chunk_size (int, optional): Maximum characters per chunk. Defaults to CHUNK_SIZE.
+        chunk_overlap (int, optional): Maximum characters shared by neighbouring chunks.
+                                       Defaults to CHUNK_OVERLAP.
+
+    Returns:
+        list: List of dictionaries with 'text', 'start' and 'end' keys
+    """
+    return [
+        {"text": text[start:end], "start": start, "end": end}
+        for start, end in chunk_spans(text, chunk_size, chunk_overlap)
+    ]
+
+def join_chunks(chunks):
+    """
+    Reassemble the original text from chunks produced by chunk_text.
+
+    Args:
+        chunks (list): Dictionaries with 'text', 'start' and 'end' keys, in any order
+
+    Returns:
+        str: The reconstructed text
+    """
+    parts = []
+    position = 0
+    for chunk in sorted(chunks, key=lambda c: c['start']):
+        if chunk['end'] <= position:
+            continue
+        parts.append(chunk['text'][max(position - chunk['start'], 0):])
+        position = chunk['end']
+    return ''.join(parts)
+
+def estimate_tokens(text):
+    """Roughly estimate the number of model tokens in text (about four characters per token)."""
+    return (len(text) + 3) // 4
@@ -0,0 +1,117 @@
+import re
+import logging
+from config import CHUNK_OVERLAP, CONTEXT_TOKEN_BUDGET, CONTEXT_MIN_PASSAGE_TOKENS
+from utils.chunking import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Shared prefix/suffix lengths (in characters) treated as chunk overlap
+_MIN_OVERLAP = 50
+_MAX_OVERLAP = 2 * CHUNK_OVERLAP
+
+# Passages sharing at least this fraction of their word shingles with a kept one are duplicates
+_DUPLICATE_CONTAINMENT = 0.8
+_SHINGLE_SIZE = 5
+
+def _shingles(text):
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < _SHINGLE_SIZE:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + _SHINGLE_SIZE]) for i in range(len(words) - _SHINGLE_SIZE + 1)}
+
+def _overlap_length(previous, text):
+    """Return the length of the longest suffix of previous that text starts with."""
+    for length in range(min(len(previous), len(text), _MAX_OVERLAP), _MIN_OVERLAP - 1, -1):
+        if text.startswith(previous[-length:]):
+            return length
+    return 0
+
+def _trim(text, max_tokens):
+    """Cut text to roughly max_tokens, preferring a sentence or word boundary."""
+    limit = max_tokens * 4
+    if len(text) <= limit:
+        return text
+    cut = max(text.rfind('. ', 0, limit) + 1, text.rfind('\n', 0, limit))
+    if cut < limit // 2:
+        cut = text.rfind(' ', 0, limit)
+    if cut <= 0:
+        cut = limit
+    return text[:cut].rstrip() + " ..."
+
+def build_context(knowledge_results=None, web_results=None, token_budget=CONTEXT_TOKEN_BUDGET,
+                  min_passage_tokens=CONTEXT_MIN_PASSAGE_TOKENS):
+    """
+    Select the retrieved passages that go into the prompt.
+
+    Each source's results are expected best first, so a passage's relevance
+    is its reciprocal rank within its source. Passages that duplicate a more
+    relevant one are dropped, and the overlap that adjacent chunks share is
+    removed. The rest are taken in relevance order until the token budget is
+    spent. A passage that does not fit is trimmed if at least
+    min_passage_tokens remain, and dropped otherwise.
+
+    Args:
+        knowledge_results (list, optional): Knowledge base passages, best first
+        web_results (list, optional): Web search passages, best first
+        token_budget (int, optional): Maximum estimated tokens across passages
+        min_passage_tokens (int, optional): Smallest trimmed passage worth keeping
+
+    Returns:
+        tuple: (knowledge passages, web passages, report) where the passage
+               lists keep their original order and report describes the
+               'context_tokens' used and the 'trimmed' and 'dropped' passages
+    """
+    candidates = []
+    for source, results in (('knowledge', knowledge_results or []), ('web', web_results or [])):
+        for rank, text in enumerate(results):
+            candidates.append({"source": source, "rank": rank, "text": text, "score": 1.0 / (rank + 1)})
+    # Stable sort keeps knowledge base passages ahead of equally ranked web ones
+    candidates.sort(key=lambda candidate: candidate['score'], reverse=True)
+
+    kept = []
+    dropped = []
+    trimmed = []
+    kept_shingles = []
+    used_tokens = 0
+    for candidate in candidates:
+        text = candidate['text']
+        entry = {"source": candidate['source'], "rank": candidate['rank'] + 1}
+
+        shingles = _shingles(text)
+        if shingles and any(len(shingles & other) >= _DUPLICATE_CONTAINMENT * len(shingles) for other in kept_shingles):
+            dropped.append({**entry, "reason": "duplicate", "tokens": estimate_tokens(text)})
+            continue
+
+        for other in kept:
+            overlap = _overlap_length(other['text'], text)
+            if overlap:
+                text = text[overlap:].lstrip()
+                break
+
+        tokens = estimate_tokens(text)
+        remaining = token_budget - used_tokens
+        if tokens > remaining:
+            if remaining < min_passage_tokens:
+                dropped.append({**entry, "reason": "budget", "tokens": tokens})
+                continue
+            text = _trim(text, remaining)
+            trimmed.append({**entry, "tokens": tokens, "kept_tokens": estimate_tokens(text)})
+            tokens = estimate_tokens(text)
+
+        kept.append({**candidate, "text": text})
+        kept_shingles.append(shingles)
+        used_tokens += tokens
+
+    if dropped or trimmed:
+        logger.info(
+            f"Context uses {used_tokens} of {token_budget} tokens; "
+            f"trimmed {len(trimmed)} and dropped {len(dropped)} passages"
+        )
+
+    kept.sort(key=lambda candidate: candidate['rank'])
+    report = {"context_tokens": used_tokens, "trimmed": trimmed, "dropped": dropped}
+    return (
+        [candidate['text'] for candidate in kept if candidate['source'] == 'knowledge'],
+        [candidate['text'] for candidate in kept if candidate['source'] == 'web'],
+        report
+    )
@@ -0,0 +1,267 @@
+import gzip
+import time
+import logging
+import threading
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import trafilatura
+from config import (
+    CRAWL_CONCURRENCY, CRAWL_HOST_INTERVAL, CRAWL_EXTRACT_WORKERS, CRAWL_STORE_BATCH_SIZE, CRAWL_MAX_URLS,
+    CRAWL_MAX_PAGE_BYTES
+)
+from utils.http import get_session
+from utils.pdf import worker_pool_context
+from utils.metrics import span
+from utils.extractors import EXTRACTOR_VERSIONS, extract_text_from_youtube, is_extraction_failure
+from utils.extraction_cache import extraction_key, normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Sitemap indexes may nest, but not without bound
+_MAX_SITEMAP_DEPTH = 3
+
+# The sitemap protocol caps a sitemap at 50MB
+_MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+# Content types trafilatura can extract; a missing Content-Type is given the benefit of the doubt
+_PAGE_CONTENT_TYPES = {'text/html', 'application/xhtml+xml'}
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+def is_youtube_url(url):
+    host = urlsplit(url).netloc.lower()
+    return host == 'youtu.be' or host == 'youtube.com' or host.endswith('.youtube.com')
+
+def is_sitemap_url(url):
+    return urlsplit(url).path.lower().endswith(('.xml', '.xml.gz'))
+
+class HostRateLimiter:
+    """Spaces out requests to each host by at least min_interval seconds, across threads."""
+
+    def __init__(self, min_interval=CRAWL_HOST_INTERVAL):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        """Block until a request to url's host is allowed."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def _fetch(url, rate_limiter, max_bytes, content_types=None):
+    """
+    Download url, giving up beyond max_bytes or, when content_types is given,
+    on a response of any other declared content type.
+    """
+    rate_limiter.wait(url)
+    with span('crawl_fetch'):
+        response = get_session().get(url, stream=True)
+        try:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+            if content_types and content_type and content_type not in content_types:
+                raise ValueError(f"Unsupported content type {content_type}")
+            if int(response.headers.get('Content-Length') or 0) > max_bytes:
+                raise ValueError(f"Larger than {max_bytes} bytes")
+            data = bytearray()
+            for chunk in response.iter_content(_READ_CHUNK_SIZE):
+                data.extend(chunk)
+                if len(data) > max_bytes:
+                    raise ValueError(f"Larger than {max_bytes} bytes")
+            return bytes(data)
+        finally:
+            response.close()
+
+def _sitemap_locations(data):
+    """Parse a sitemap; return (is_index, locations)."""
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    root = ElementTree.fromstring(data)
+    locations = [
+        element.text.strip() for element in root.iter()
+        if element.tag.rsplit('}', 1)[-1] == 'loc' and element.text and element.text.strip()
+    ]
+    return root.tag.rsplit('}', 1)[-1] == 'sitemapindex', locations
+
+def expand_sitemaps(urls, rate_limiter, max_urls=CRAWL_MAX_URLS):
+    """
+    Replace sitemap URLs by the pages they list, following sitemap indexes.
+
+    Pages are deduplicated and kept in order, up to max_urls of them.
+
+    Returns:
+        tuple: (page URLs, failures), failures being dicts with 'url' and 'error'
+    """
+    pages, seen, failures = [], set(), []
+
+    def visit(url, is_sitemap, depth):
+        if len(pages) >= max_urls:
+            return
+        if not is_sitemap:
+            key = normalize_url(url)
+            if key not in seen:
+                seen.add(key)
+                pages.append(url)
+            return
+        if depth > _MAX_SITEMAP_DEPTH:
+            failures.append({"url": url, "error": "Sitemaps nested too deeply"})
+            return
+        try:
+            is_index, locations = _sitemap_locations(_fetch(url, rate_limiter, _MAX_SITEMAP_BYTES))
+        except Exception as e:
+            logger.warning(f"Error reading sitemap {url}: {str(e)}")
+            failures.append({"url": url, "error": str(e)})
+            return
+        for location in locations:
+            visit(location, is_index, depth + 1)
+
+    for url in urls:
+        visit(url, is_sitemap_url(url), 0)
+    if len(pages) >= max_urls:
+        logger.warning(f"URL list truncated to {max_urls} pages")
+    return pages, failures
+
+def _extract_html(html, url):
+    """Worker task: extract the main text of a web page."""
+    return trafilatura.extract(html, url=url) or ''
+
+def _extract_url(url, rate_limiter, extract_pool, cache, max_page_bytes=CRAWL_MAX_PAGE_BYTES):
+    """
+    Fetch and extract one URL, consulting the extraction cache first.
+
+    Returns:
+        tuple: (source_type, text, cached)
+    """
+    source_type = 'youtube' if is_youtube_url(url) else 'website'
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = extraction_key(source_type, url, EXTRACTOR_VERSIONS[source_type])
+            text = cache.get(cache_key)
+            if text is not None:
+                return source_type, text, True
+        except Exception as e:
+            logger.warning(f"Error reading extraction cache: {str(e)}")
+
+    if source_type == 'youtube':
+        rate_limiter.wait(url)
+        text = extract_text_from_youtube(url)
+        if is_extraction_failure(text):
+            raise ValueError(text)
+    else:
+        html = _fetch(url, rate_limiter, max_page_bytes, _PAGE_CONTENT_TYPES)
+        with span('crawl_extract'):
+            if extract_pool is not None:
+                text = extract_pool.submit(_extract_html, html, url).result()
+            else:
+                text = _extract_html(html, url)
+        if not text.strip():
+            raise ValueError("No text content could be extracted")
+
+    if cache_key is not None:
+        try:
+            cache.set(cache_key, text)
+        except Exception as e:
+            logger.warning(f"Error writing extraction cache: {str(e)}")
+    return source_type, text, False
+
+def ingest_urls(urls, store, concurrency=CRAWL_CONCURRENCY, host_interval=CRAWL_HOST_INTERVAL,
+                extract_workers=CRAWL_EXTRACT_WORKERS, batch_size=CRAWL_STORE_BATCH_SIZE,
+                max_urls=CRAWL_MAX_URLS, max_page_bytes=CRAWL_MAX_PAGE_BYTES, cache=None, progress=None):
+    """
+    Fetch web pages and YouTube transcripts in bulk and store them as documents.
+
+    Sitemap URLs (.xml or .xml.gz) are expanded into the pages they list.
+    Pages that are not HTML or are larger than max_page_bytes are skipped.
+    Pages are fetched by `concurrency` threads, with requests to each host at
+    least host_interval seconds apart, and their text is extracted by a pool
+    of extract_workers processes. Extracted documents are stored with
+    store.add_documents in batches of batch_size as they arrive, so embedding
+    and upserts overlap with fetching.
+
+    Args:
+        urls (list): Page, YouTube or sitemap URLs
+        store (QdrantService): Where documents are stored
+        concurrency (int, optional): Concurrent fetches
+        host_interval (float, optional): Minimum seconds between requests to one host
+        extract_workers (int, optional): Extraction processes; 1 extracts in the fetch threads
+        batch_size (int, optional): Documents per add_documents call
+        max_urls (int, optional): Maximum pages to ingest
+        max_page_bytes (int, optional): Maximum size of a downloaded page
+        cache (ExtractionCache, optional): Cache of extracted text to consult and fill
+        progress (callable, optional): Called as progress(fraction, message)
+
+    Returns:
+        dict: Counts of pages 'total', 'extracted', 'cached', 'stored',
+              'duplicates' and 'failed', the 'failures' (with 'url' and
+              'error') and the 'elapsed' seconds
+    """
+    if progress is None:
+        progress = lambda fraction, message=None: None
+    started = time.monotonic()
+    rate_limiter = HostRateLimiter(host_interval)
+
+    progress(0.0, "Reading URL list")
+    pages, failures = expand_sitemaps(urls, rate_limiter, max_urls)
+    report = {"total": len(pages), "extracted": 0, "cached": 0, "stored": 0, "duplicates": 0}
+    pending = []
+
+    def store_pending():
+        try:
+            results = store.add_documents(pending)
+        except Exception as e:
+            # Keep crawling; only this batch's pages are lost
+            logger.error(f"Error storing {len(pending)} pages: {str(e)}")
+            results = [{"success": False, "error": str(e)}] * len(pending)
+        for document_data, result in zip(pending, results):
+            if not result['success']:
+                failures.append({"url": document_data['source'], "error": result['error']})
+            elif result.get('duplicate'):
+                report['duplicates'] += 1
+            else:
+                report['stored'] += 1
+        pending.clear()
+
+    extract_pool = None
+    if extract_workers > 1 and pages:
+        extract_pool = ProcessPoolExecutor(max_workers=extract_workers, mp_context=worker_pool_context())
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='crawl') as fetchers:
+            futures = {
+                fetchers.submit(_extract_url, url, rate_limiter, extract_pool, cache, max_page_bytes): url
+                for url in pages
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                try:
+                    source_type, text, cached = future.result()
+                except Exception as e:
+                    logger.warning(f"Error ingesting {url}: {str(e)}")
+                    failures.append({"url": url, "error": str(e)})
+                else:
+                    report['extracted'] += 1
+                    report['cached'] += int(cached)
+                    pending.append({'text': text, 'title': '', 'source_type': source_type, 'source': url})
+                    if len(pending) >= batch_size:
+                        store_pending()
+                progress(0.95 * done / len(pages), f"Processed {done} of {len(pages)} URLs")
+            if pending:
+                store_pending()
+    finally:
+        if extract_pool is not None:
+            extract_pool.shutdown(cancel_futures=True)
+
+    report['failed'] = len(failures)
+    report['failures'] = failures
+    report['elapsed'] = round(time.monotonic() - started, 2)
+    logger.info(
+        f"Ingested {report['stored']} of {report['total']} URLs in {report['elapsed']}s "
+        f"({report['duplicates']} duplicates, {report['failed']} failures)"
+    )
+    return report
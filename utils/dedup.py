@@ -0,0 +1,86 @@
+import re
+import uuid
+import hashlib
+import logging
+import unicodedata
+import numpy as np
+from config import MINHASH_PERMUTATIONS, MINHASH_BANDS
+
+logger = logging.getLogger(__name__)
+
+# Namespace for document IDs derived from content hashes
+DOCUMENT_NAMESPACE = uuid.UUID('6f1c1f3e-5a0b-4d8e-9c36-2b7f3c1d9a42')
+
+# Universal hashing over a prime just above 2**32; with 32-bit shingle hashes
+# and coefficients, a * x + b cannot overflow uint64
+_MERSENNE_PRIME = np.uint64(4294967311)
+_SHINGLE_SIZE = 5
+_SHINGLE_BLOCK = 8192
+
+_rng = np.random.RandomState(1)
+_PERMUTATION_A = _rng.randint(1, 2 ** 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERMUTATION_B = _rng.randint(0, 2 ** 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+def normalize_text(text):
+    """Normalize text for hashing: Unicode NFKC and collapsed whitespace."""
+    return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+def content_hash(text):
+    """Return the SHA-256 hex digest of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+def document_id_for_hash(digest):
+    """Return the deterministic document ID for a content hash."""
+    return str(uuid.uuid5(DOCUMENT_NAMESPACE, digest))
+
+def _shingle_hashes(text):
+    words = re.findall(r'\w+', normalize_text(text).lower())
+    if len(words) < _SHINGLE_SIZE:
+        shingles = [' '.join(words)] if words else []
+    else:
+        shingles = {' '.join(words[i:i + _SHINGLE_SIZE]) for i in range(len(words) - _SHINGLE_SIZE + 1)}
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles),
+        dtype=np.uint64
+    )
+
+def minhash_signature(text):
+    """
+    Compute the MinHash signature of a text's word 5-gram shingles.
+
+    Two signatures agree in each position with probability equal to the
+    Jaccard similarity of the texts' shingle sets.
+
+    Returns:
+        list: MINHASH_PERMUTATIONS integers
+    """
+    hashes = _shingle_hashes(text)
+    signature = np.full(MINHASH_PERMUTATIONS, _MERSENNE_PRIME, dtype=np.uint64)
+    # Work through the shingles in blocks to bound memory on long documents
+    for start in range(0, len(hashes), _SHINGLE_BLOCK):
+        block = hashes[start:start + _SHINGLE_BLOCK]
+        permuted = (np.outer(_PERMUTATION_A, block) + _PERMUTATION_B[:, None]) % _MERSENNE_PRIME
+        signature = np.minimum(signature, permuted.min(axis=1))
+    return signature.tolist()
+
+def minhash_bands(signature, bands=MINHASH_BANDS):
+    """
+    Split a signature into locality-sensitive hashing band keys.
+
+    Near-duplicates share at least one band key with high probability, so
+    candidates can be found with a keyword match instead of a full scan.
+    """
+    rows = len(signature) // bands
+    return [
+        f"{band}:" + hashlib.blake2b(
+            ','.join(str(value) for value in signature[band * rows:(band + 1) * rows]).encode('ascii'),
+            digest_size=8
+        ).hexdigest()
+        for band in range(bands)
+    ]
+
+def estimate_similarity(signature, other):
+    """Estimate the Jaccard similarity of two texts from their MinHash signatures."""
+    if not signature or len(signature) != len(other):
+        return 0.0
+    return sum(1 for a, b in zip(signature, other) if a == b) / len(signature)
@@ -0,0 +1,196 @@
+import time
+import array
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from config import QUERY_CACHE_SIZE, QUERY_CACHE_TTL, QUERY_CACHE_BACKEND, QUERY_CACHE_PATH
+from utils.shared import ProcessWide, open_sqlite
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(text):
+    """
+    Normalize query text for cache lookups.
+
+    Collapses whitespace and lowercases the text. The BGE models use an uncased
+    tokenizer, so lowercasing does not change the resulting embedding.
+    """
+    return ' '.join(text.split()).lower()
+
+def cache_key(text, model_name):
+    """Return the cache key for a query text under a given embedding model."""
+    digest = hashlib.sha256(f"{model_name}\x00{normalize_query(text)}".encode('utf-8'))
+    return digest.hexdigest()
+
+class SqliteEmbeddingStore:
+    """
+    SQLite-backed embedding store that gunicorn workers on the same host can share.
+
+    Vectors are stored as float32 blobs. Entries older than ttl seconds are
+    ignored, and the least recently used entries beyond max_size are evicted.
+    """
+
+    def __init__(self, path=QUERY_CACHE_PATH, max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL):
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._connection = open_sqlite(
+            path,
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)"
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT vector FROM embeddings WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE embeddings SET accessed_at = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+        return array.array('f', row[0]).tolist()
+
+    def set(self, key, vector):
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, array.array('f', vector).tobytes(), now, now)
+            )
+            self._writes += 1
+            # Evict periodically rather than on every write
+            if self._writes % 100 == 0:
+                self._evict(now)
+            self._connection.commit()
+
+    def _evict(self, now):
+        self._connection.execute("DELETE FROM embeddings WHERE created_at <= ?", (now - self.ttl,))
+        self._connection.execute(
+            "DELETE FROM embeddings WHERE key NOT IN "
+            "(SELECT key FROM embeddings ORDER BY accessed_at DESC LIMIT ?)",
+            (self.max_size,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM embeddings")
+            self._connection.commit()
+
+class EmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings with a time-to-live.
+
+    An optional shared store (e.g. SqliteEmbeddingStore) acts as a second tier
+    behind the in-process LRU, so entries warmed by one worker are available to
+    the others.
+    """
+
+    def __init__(self, max_size=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL, shared_store=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_store = shared_store
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def get(self, text, model_name):
+        """Return the cached vector for text under model_name, or None."""
+        key = cache_key(text, model_name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                vector, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vector
+                del self._entries[key]
+
+        if self.shared_store is not None:
+            try:
+                vector = self.shared_store.get(key)
+            except Exception as e:
+                logger.warning(f"Error reading shared embedding cache: {str(e)}")
+                vector = None
+            if vector is not None:
+                self._store_local(key, vector, now)
+                with self._lock:
+                    self.shared_hits += 1
+                return vector
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, text, model_name, vector):
+        """Cache the vector for text under model_name."""
+        key = cache_key(text, model_name)
+        self._store_local(key, vector, time.monotonic())
+        if self.shared_store is not None:
+            try:
+                self.shared_store.set(key, vector)
+            except Exception as e:
+                logger.warning(f"Error writing shared embedding cache: {str(e)}")
+
+    def get_or_compute(self, text, model_name, compute):
+        """Return the cached vector, or compute it with compute(text) and cache it."""
+        vector = self.get(text, model_name)
+        if vector is None:
+            vector = compute(text)
+            self.set(text, model_name, vector)
+        return vector
+
+    def _store_local(self, key, vector, now):
+        with self._lock:
+            self._entries[key] = (vector, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries, including those in the shared store."""
+        with self._lock:
+            self._entries.clear()
+        if self.shared_store is not None:
+            self.shared_store.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
+
+def create_query_embedding_cache(backend=QUERY_CACHE_BACKEND):
+    """Create a query embedding cache for the configured backend ('memory', 'sqlite' or 'none')."""
+    if backend == 'none':
+        return None
+    if backend == 'sqlite':
+        return EmbeddingCache(shared_store=SqliteEmbeddingStore())
+    if backend == 'memory':
+        return EmbeddingCache()
+    raise ValueError(f"Unknown query cache backend: {backend}")
+
+_cache = ProcessWide(create_query_embedding_cache)
+
+def get_query_embedding_cache():
+    """Return the process-wide query embedding cache, creating it on first use."""
+    return _cache.get()
@@ -0,0 +1,181 @@
+import os
+import re
+import hashlib
+import logging
+import threading
+import numpy as np
+from config import EMBEDDING_STORE_ENABLED, EMBEDDING_STORE_PATH, EMBEDDING_STORE_DTYPE
+from utils.shared import ProcessWide, open_sqlite
+
+logger = logging.getLogger(__name__)
+
+def text_key(text):
+    """Return the store key for a chunk of text: the SHA-256 of its exact contents."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+class _ModelVectors:
+    """
+    Vectors for one embedding model: an append-only array file plus an index.
+
+    Rows are appended to a flat file of fixed-width vectors and read back
+    through a memory map. A SQLite table maps each key to its row; appending
+    happens inside an immediate transaction on that table, which serializes
+    writers across processes so rows never interleave.
+    """
+
+    def __init__(self, directory, dimension, dtype):
+        self.dimension = dimension
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = self.dimension * self.dtype.itemsize
+        self.vectors_path = os.path.join(directory, f"vectors.{self.dtype.name}")
+        self._lock = threading.Lock()
+        self._map = None
+        os.makedirs(directory, exist_ok=True)
+        # Autocommit mode so transactions are managed explicitly
+        self._connection = open_sqlite(
+            os.path.join(directory, "index.sqlite3"),
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, row INTEGER NOT NULL)",
+            timeout=30, isolation_level=None
+        )
+        open(self.vectors_path, 'ab').close()
+
+    def _rows(self, min_rows):
+        """Return a memory map covering at least min_rows rows, remapping if the file grew."""
+        if self._map is None or len(self._map) < min_rows:
+            rows = os.path.getsize(self.vectors_path) // self.row_bytes
+            self._map = np.memmap(self.vectors_path, dtype=self.dtype, mode='r', shape=(rows, self.dimension)) if rows else None
+        return self._map
+
+    def _lookup(self, keys):
+        """Return {key: row} for the stored keys, querying in batches below SQLite's variable limit."""
+        found = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            found.update(self._connection.execute(
+                f"SELECT key, row FROM vectors WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall())
+        return found
+
+    def get_many(self, keys):
+        with self._lock:
+            found = self._lookup(keys)
+            if not found:
+                return {}
+            rows = self._rows(max(found.values()) + 1)
+            if rows is None:
+                return {}
+            return {
+                key: rows[row].astype(np.float32).tolist()
+                for key, row in found.items() if row < len(rows)
+            }
+
+    def put_many(self, keys, vectors):
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                existing = self._lookup(keys)
+                new = {}
+                for key, vector in zip(keys, vectors):
+                    if key not in existing and key not in new:
+                        new[key] = vector
+                if new:
+                    block = np.asarray(list(new.values()), dtype=self.dtype).reshape(len(new), self.dimension)
+                    with open(self.vectors_path, 'ab') as file:
+                        # Drop any partial row left by an interrupted writer
+                        first_row = file.seek(0, os.SEEK_END) // self.row_bytes
+                        file.truncate(first_row * self.row_bytes)
+                        file.seek(first_row * self.row_bytes)
+                        file.write(block.tobytes())
+                        file.flush()
+                        os.fsync(file.fileno())
+                    self._connection.executemany(
+                        "INSERT INTO vectors (key, row) VALUES (?, ?)",
+                        [(key, first_row + offset) for offset, key in enumerate(new)]
+                    )
+                self._connection.execute("COMMIT")
+            except Exception:
+                self._connection.execute("ROLLBACK")
+                raise
+            return len(new)
+
+    def count(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+class EmbeddingStore:
+    """
+    On-disk store of document chunk embeddings keyed by content hash.
+
+    Vectors are kept per embedding model (and dimension), so switching models
+    never returns stale vectors. Rebuilding or re-creating a collection can
+    replay stored vectors at disk speed instead of running the model again.
+    """
+
+    def __init__(self, directory=EMBEDDING_STORE_PATH, dtype=EMBEDDING_STORE_DTYPE):
+        self.directory = directory
+        self.dtype = dtype
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _model_vectors(self, model_name, dimension):
+        name = f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)}-{dimension}"
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = _ModelVectors(os.path.join(self.directory, name), dimension, self.dtype)
+            return self._models[name]
+
+    def get_many(self, model_name, dimension, texts):
+        """Return {index: vector} for the texts whose embeddings are stored."""
+        keys = [text_key(text) for text in texts]
+        found = self._model_vectors(model_name, dimension).get_many(list(set(keys)))
+        return {index: found[key] for index, key in enumerate(keys) if key in found}
+
+    def put_many(self, model_name, dimension, texts, vectors):
+        """Store embeddings for texts, ignoring ones already stored. Returns the number added."""
+        if not texts:
+            return 0
+        return self._model_vectors(model_name, dimension).put_many([text_key(text) for text in texts], vectors)
+
+    def embed_documents(self, embedder, texts):
+        """
+        Embed texts with embedder, reusing stored vectors and storing new ones.
+
+        Args:
+            embedder (EmbeddingProvider): Provider used for texts not yet stored
+            texts (list): The texts to embed
+
+        Returns:
+            list: One vector per input text
+        """
+        try:
+            stored = self.get_many(embedder.model_name, embedder.dimension, texts)
+        except Exception as e:
+            logger.warning(f"Error reading embedding store: {str(e)}")
+            stored = {}
+        missing = [index for index in range(len(texts)) if index not in stored]
+        if missing:
+            # Embed each distinct text once, even if it repeats within the batch
+            unique_texts = list(dict.fromkeys(texts[index] for index in missing))
+            computed = embedder.embed_documents(unique_texts)
+            try:
+                self.put_many(embedder.model_name, embedder.dimension, unique_texts, computed)
+            except Exception as e:
+                logger.warning(f"Error writing embedding store: {str(e)}")
+            by_text = dict(zip(unique_texts, computed))
+            stored.update((index, by_text[texts[index]]) for index in missing)
+        logger.debug(f"Embedding store served {len(texts) - len(missing)} of {len(texts)} chunks")
+        return [stored[index] for index in range(len(texts))]
+
+    def count(self, model_name, dimension):
+        """Return the number of vectors stored for a model."""
+        return self._model_vectors(model_name, dimension).count()
+
+def create_embedding_store(enabled=EMBEDDING_STORE_ENABLED):
+    """Create the document embedding store, or None when it is disabled."""
+    return EmbeddingStore() if enabled else None
+
+_store = ProcessWide(create_embedding_store)
+
+def get_embedding_store():
+    """Return the process-wide document embedding store (None if disabled), creating it on first use."""
+    return _store.get()
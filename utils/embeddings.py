@@ -0,0 +1,215 @@
+import re
+import hashlib
+import logging
+import math
+from collections import Counter
+from config import (
+    EMBEDDING_MODEL_NAME, EMBEDDING_PROVIDER, VECTOR_SIZE,
+    SPARSE_EMBEDDING_PROVIDER, SPARSE_EMBEDDING_MODEL_NAME
+)
+from utils.shared import LazyModel, ProcessWide
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingProvider:
+    """
+    Base class for embedding providers.
+
+    Subclasses implement `embed_documents`; everything else in the application
+    talks to this interface so the backing model can be swapped (for example a
+    deterministic stand-in during tests).
+    """
+    model_name = None
+    dimension = VECTOR_SIZE
+
+    def embed_documents(self, texts):
+        """
+        Embed a list of texts.
+
+        Args:
+            texts (list): The texts to embed
+
+        Returns:
+            list: One list of floats per input text
+        """
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        """Embed a single query text and return its vector."""
+        return self.embed_documents([text])[0]
+
+    def warmup(self):
+        """Load any underlying model ahead of the first request."""
+        pass
+
+class FastEmbedProvider(EmbeddingProvider):
+    """Embedding provider backed by fastembed, loading the ONNX model once per process."""
+
+    def __init__(self, model_name=EMBEDDING_MODEL_NAME, dimension=VECTOR_SIZE):
+        self.model_name = model_name
+        self.dimension = dimension
+        self._model = LazyModel(self._load_model, f"embedding model {model_name}")
+
+    def _load_model(self):
+        from fastembed import TextEmbedding
+        return TextEmbedding(model_name=self.model_name)
+
+    def embed_documents(self, texts):
+        return [embedding.tolist() for embedding in self._model.get().embed(list(texts))]
+
+    def warmup(self):
+        self._model.get()
+
+class HashEmbedProvider(EmbeddingProvider):
+    """
+    Deterministic local embedding provider.
+
+    Hashes word tokens into a fixed-size vector, with no model download or
+    network access. Similar wording gives similar vectors; meaning does not.
+    """
+
+    def __init__(self, dimension=VECTOR_SIZE):
+        self.model_name = f"local-hash-{dimension}"
+        self.dimension = dimension
+
+    def embed_documents(self, texts):
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dimension
+            for token in text.lower().split():
+                digest = hashlib.md5(token.encode('utf-8')).digest()
+                index = int.from_bytes(digest[:4], 'little') % self.dimension
+                vector[index] += 1.0 if digest[4] % 2 == 0 else -1.0
+            norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+            vectors.append([value / norm for value in vector])
+        return vectors
+
+_PROVIDERS = {
+    'fastembed': FastEmbedProvider,
+    'hash': HashEmbedProvider,
+}
+
+def create_embedding_provider(name=EMBEDDING_PROVIDER):
+    """Create a new embedding provider by its registered name."""
+    try:
+        return _PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown embedding provider: {name}")
+
+def register_embedding_provider(name, provider_class):
+    """Register an additional embedding provider class under the given name."""
+    _PROVIDERS[name] = provider_class
+
+_provider = ProcessWide(create_embedding_provider)
+
+def get_embedding_provider():
+    """Return the process-wide embedding provider, creating it on first use."""
+    return _provider.get()
+
+def set_embedding_provider(provider):
+    """Replace the process-wide embedding provider (e.g. with a test stand-in)."""
+    _provider.set(provider)
+
+class SparseEmbeddingProvider:
+    """
+    Base class for sparse (lexical) embedding providers.
+
+    Sparse embeddings are returned as (indices, values) tuples. They are
+    stored next to the dense vector so exact terms such as drug names,
+    diagnostic codes and acronyms can be matched at query time.
+    """
+    model_name = None
+
+    def embed_documents(self, texts):
+        """
+        Embed a list of texts.
+
+        Args:
+            texts (list): The texts to embed
+
+        Returns:
+            list: One (indices, values) tuple per input text
+        """
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        """Embed a single query text and return its (indices, values) tuple."""
+        return self.embed_documents([text])[0]
+
+    def warmup(self):
+        """Load any underlying model ahead of the first request."""
+        pass
+
+class FastEmbedSparseProvider(SparseEmbeddingProvider):
+    """BM25 sparse embeddings from fastembed, loaded once per process."""
+
+    def __init__(self, model_name=SPARSE_EMBEDDING_MODEL_NAME):
+        self.model_name = model_name
+        self._model = LazyModel(self._load_model, f"sparse embedding model {model_name}")
+
+    def _load_model(self):
+        from fastembed import SparseTextEmbedding
+        return SparseTextEmbedding(model_name=self.model_name)
+
+    def embed_documents(self, texts):
+        model = self._model.get()
+        return [
+            (embedding.indices.tolist(), embedding.values.tolist())
+            for embedding in model.embed(list(texts))
+        ]
+
+    def embed_query(self, text):
+        # BM25 weights query terms differently from document terms
+        embedding = next(iter(self._model.get().query_embed(text)))
+        return embedding.indices.tolist(), embedding.values.tolist()
+
+    def warmup(self):
+        self._model.get()
+
+class HashSparseProvider(SparseEmbeddingProvider):
+    """
+    Deterministic local sparse provider.
+
+    Maps lowercased word tokens to hashed indices weighted by term frequency;
+    IDF weighting is applied by Qdrant at query time.
+    """
+    model_name = "local-hash-sparse"
+
+    def embed_documents(self, texts):
+        embeddings = []
+        for text in texts:
+            counts = Counter()
+            for token in re.findall(r'\w+', text.lower()):
+                digest = hashlib.md5(token.encode('utf-8')).digest()
+                counts[int.from_bytes(digest[:4], 'little')] += 1
+            indices = sorted(counts)
+            embeddings.append((indices, [float(counts[index]) for index in indices]))
+        return embeddings
+
+    def embed_query(self, text):
+        indices, _ = self.embed_documents([text])[0]
+        return indices, [1.0] * len(indices)
+
+_SPARSE_PROVIDERS = {
+    'fastembed': FastEmbedSparseProvider,
+    'hash': HashSparseProvider,
+}
+
+def create_sparse_embedding_provider(name=SPARSE_EMBEDDING_PROVIDER):
+    """Create a new sparse embedding provider by its registered name, or None for 'none'."""
+    if name == 'none':
+        return None
+    try:
+        return _SPARSE_PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown sparse embedding provider: {name}")
+
+_sparse_provider = ProcessWide(create_sparse_embedding_provider)
+
+def get_sparse_embedding_provider():
+    """Return the process-wide sparse embedding provider (None if sparse vectors are disabled)."""
+    return _sparse_provider.get()
+
+def set_sparse_embedding_provider(provider):
+    """Replace the process-wide sparse embedding provider."""
+    _sparse_provider.set(provider)
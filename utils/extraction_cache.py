@@ -0,0 +1,142 @@
+import time
+import zlib
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit, urlunsplit
+from config import (
+    EXTRACTION_CACHE_ENABLED, EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_MAX_BYTES, EXTRACTION_CACHE_TTL
+)
+from utils.shared import ProcessWide, open_sqlite
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+def normalize_url(url):
+    """Normalize a URL for cache lookups: trim it, lowercase scheme and host, drop the fragment."""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ''))
+
+def _stream_digest(stream):
+    """Hash a seekable stream from its current position, leaving the position unchanged."""
+    position = stream.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(_HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(position)
+    return digest.hexdigest()
+
+def extraction_key(source_type, source, version):
+    """
+    Return the cache key for extracting a source with a given extractor version.
+
+    Args:
+        source_type (str): The extractor's source type (e.g. 'audio', 'website')
+        source: A URL string, or an uploaded file whose contents are hashed
+        version (str): The extractor version; bumping it invalidates old entries
+
+    Returns:
+        str: The cache key
+    """
+    if isinstance(source, str):
+        identity = normalize_url(source)
+    else:
+        identity = _stream_digest(source.stream)
+    digest = hashlib.sha256(f"{source_type}\x00{version}\x00{identity}".encode('utf-8'))
+    return digest.hexdigest()
+
+class ExtractionCache:
+    """
+    SQLite-backed cache of extracted text that gunicorn workers on the same host can share.
+
+    Content is stored zlib-compressed. Entries older than ttl seconds are
+    ignored, and the least recently used entries are evicted once the
+    compressed content exceeds max_bytes in total.
+    """
+
+    def __init__(self, path=EXTRACTION_CACHE_PATH, max_bytes=EXTRACTION_CACHE_MAX_BYTES, ttl=EXTRACTION_CACHE_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._connection = open_sqlite(
+            path,
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            "key TEXT PRIMARY KEY, content BLOB NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS extractions_accessed_at ON extractions (accessed_at)"
+        )
+
+    def get(self, key):
+        """Return the cached text for key, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT content FROM extractions WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE extractions SET accessed_at = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self.hits += 1
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def set(self, key, content):
+        """Cache the text extracted for key, evicting old entries beyond max_bytes."""
+        blob = zlib.compress(content.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO extractions (key, content, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            # Extractions are slow, so writes are rare enough to evict on each one
+            self._evict(now)
+            self._connection.commit()
+
+    def _evict(self, now):
+        self._connection.execute("DELETE FROM extractions WHERE created_at <= ?", (now - self.ttl,))
+        self._connection.execute(
+            "DELETE FROM extractions WHERE key IN ("
+            "SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS total "
+            "FROM extractions) WHERE total > ?)",
+            (self.max_bytes,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM extractions")
+            self._connection.commit()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            entries, size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "size": size,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+def create_extraction_cache(enabled=EXTRACTION_CACHE_ENABLED):
+    """Create the extraction cache, or return None when it is disabled."""
+    return ExtractionCache() if enabled else None
+
+_cache = ProcessWide(create_extraction_cache)
+
+def get_extraction_cache():
+    """Return the process-wide extraction cache, creating it on first use."""
+    return _cache.get()
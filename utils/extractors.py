@@ -1,15 +1,36 @@
 import os
+import base64
 import logging
+import mimetypes
 from werkzeug.utils import secure_filename
-from config import UPLOAD_FOLDER, ALLOWED_EXTENSIONS
+from config import (
+    ALLOWED_EXTENSIONS, GEMINI_API_BASE, GEMINI_MODEL, GOOGLE_API_KEY, GEMINI_UPLOAD_CHUNK_SIZE,
+    GEMINI_INLINE_MAX_BYTES
+)
+from utils.http import get_session
+from utils.ai import GEMINI_MODEL_URL, extract_response_text
+from utils.pdf import extract_pdf_text
 import trafilatura
-import PyPDF2
 from youtube_transcript_api import YouTubeTranscriptApi
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Versions of the extractors whose results are cached (see utils.extraction_cache), by
+# source type; bump one when its output changes so stale cached text is not reused
+EXTRACTOR_VERSIONS = {
+    'audio': f"1:{GEMINI_MODEL}",
+    'image': f"1:{GEMINI_MODEL}",
+    'youtube': "1",
+    'website': f"1:trafilatura-{trafilatura.__version__}",
+}
+
+# Extractors report some failures as text rather than raising
+_FAILURE_PREFIXES = ("Failed to ", "Invalid YouTube URL", "Could not extract text from ")
+
+def is_extraction_failure(text):
+    """Whether an extractor's result is an error message rather than extracted content."""
+    return text.startswith(_FAILURE_PREFIXES)
+
 def allowed_file(filename, file_type=None):
     """
     Check if a file has an allowed extension.
@@ -48,26 +69,14 @@ def extract_text_from_file(file):
         raise
 
 def extract_text_from_pdf(file):
-    """Extract text from a PDF file."""
+    """
+    Extract text from a PDF file.
+    
+    The upload is read into memory and its pages are extracted in parallel
+    within the configured page and time budgets (see utils.pdf).
+    """
     try:
-        # Save the file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
-        # Extract text from PDF
-        text = ""
-        try:
-            with open(filepath, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        
+        text = extract_pdf_text(file.read())
         return text if text.strip() else "No text could be extracted from the PDF"
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
@@ -95,120 +104,119 @@ def extract_text_from_youtube(url):
         logger.error(f"Error extracting text from YouTube: {str(e)}")
         return f"Failed to extract transcript: {str(e)}"
 
+def _stream_size(stream):
+    """Return the number of bytes left in a seekable stream without reading it."""
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END) - position
+    stream.seek(position)
+    return size
+
+def upload_file_to_gemini(stream, mime_type, display_name, chunk_size=GEMINI_UPLOAD_CHUNK_SIZE):
+    """
+    Upload a file to the Gemini Files API with the resumable upload protocol.
+    
+    The stream is sent in chunks of chunk_size bytes, so at most one chunk is
+    held in memory and a retried request only resends its own chunk.
+    
+    Args:
+        stream: A seekable binary stream positioned at the start of the file
+        mime_type (str): The file's MIME type
+        display_name (str): Name shown for the file in the Files API
+        chunk_size (int, optional): Bytes per upload request (a multiple of 256KB)
+    
+    Returns:
+        str: The uploaded file's URI
+    """
+    file_size = _stream_size(stream)
+    
+    # Step 1: Start a resumable upload session
+    headers = {
+        "X-Goog-Upload-Protocol": "resumable",
+        "X-Goog-Upload-Command": "start",
+        "X-Goog-Upload-Header-Content-Length": str(file_size),
+        "X-Goog-Upload-Header-Content-Type": mime_type,
+        "Content-Type": "application/json"
+    }
+    response = get_session().post(
+        f"{GEMINI_API_BASE}/upload/v1beta/files",
+        params={'key': GOOGLE_API_KEY},
+        headers=headers,
+        json={"file": {"display_name": display_name}}
+    )
+    if response.status_code != 200:
+        raise Exception(f"Initial upload request failed: {response.status_code}, {response.text}")
+    
+    upload_url = response.headers.get("X-Goog-Upload-URL")
+    if not upload_url:
+        raise Exception("Failed to get upload URL")
+    
+    # Step 2: Send the bytes chunk by chunk, finalizing with the last one
+    offset = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        last = offset + len(chunk) >= file_size
+        headers = {
+            "Content-Length": str(len(chunk)),
+            "X-Goog-Upload-Offset": str(offset),
+            "X-Goog-Upload-Command": "upload, finalize" if last else "upload"
+        }
+        response = get_session().post(upload_url, headers=headers, data=chunk)
+        if response.status_code != 200:
+            raise Exception(f"File upload failed: {response.status_code}, {response.text}")
+        offset += len(chunk)
+        if last:
+            break
+        # Release this chunk (also referenced by the response's request) before reading the next
+        chunk = response = None
+    
+    file_uri = response.json().get("file", {}).get("uri")
+    if not file_uri:
+        raise Exception("Failed to get file URI")
+    return file_uri
+
+def _generate_from_file_part(instruction, file_part):
+    """Ask Gemini to process one file part and return the text of its answer."""
+    payload = {
+        "contents": [{
+            "parts": [
+                {"text": instruction},
+                file_part
+            ]
+        }]
+    }
+    
+    response = get_session().post(f"{GEMINI_MODEL_URL}:generateContent", params={'key': GOOGLE_API_KEY}, json=payload)
+    if response.status_code != 200:
+        raise Exception(f"Request failed: {response.status_code}, {response.text}")
+    
+    text = extract_response_text(response.json(), default=None)
+    if text is None:
+        raise Exception("No text found in the response")
+    return text
+
 def extract_text_from_audio(file):
     """
     Extract text from an audio file using Gemini API.
     
+    The upload is streamed from the request to the Gemini Files API in chunks
+    (see upload_file_to_gemini) without a temporary file.
+    
     Args:
         file: The audio file object
         
     Returns:
         str: The transcribed text
     """
-    import os
-    import tempfile
-    import requests
-    import json
-    from config import GOOGLE_API_KEY
-    
     try:
-        # Save the file temporarily
         filename = secure_filename(file.filename)
+        mime_type = mimetypes.guess_type(filename)[0] or 'audio/mp3'
         
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as temp_file:
-            file.save(temp_file.name)
-            audio_path = temp_file.name
-        
-        try:
-            # Get MIME type
-            import mimetypes
-            mime_type = mimetypes.guess_type(filename)[0] or 'audio/mp3'
-            
-            # Get file size
-            file_size = os.path.getsize(audio_path)
-            
-            # Step 1: Upload the file
-            headers = {
-                "X-Goog-Upload-Protocol": "resumable",
-                "X-Goog-Upload-Command": "start",
-                "X-Goog-Upload-Header-Content-Length": str(file_size),
-                "X-Goog-Upload-Header-Content-Type": mime_type,
-                "Content-Type": "application/json"
-            }
-            
-            upload_url = f"https://generativelanguage.googleapis.com/upload/v1beta/files?key={GOOGLE_API_KEY}"
-            display_name = os.path.basename(audio_path)
-            
-            # Make the initial resumable request
-            response = requests.post(
-                upload_url,
-                headers=headers,
-                data=json.dumps({"file": {"display_name": display_name}})
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Initial upload request failed: {response.status_code}, {response.text}")
-            
-            # Get the upload URL from response headers
-            upload_url = response.headers.get("X-Goog-Upload-URL")
-            if not upload_url:
-                raise Exception("Failed to get upload URL")
-            
-            # Step 2: Upload the actual file bytes
-            with open(audio_path, 'rb') as f:
-                file_data = f.read()
-                
-            headers = {
-                "Content-Length": str(file_size),
-                "X-Goog-Upload-Offset": "0",
-                "X-Goog-Upload-Command": "upload, finalize"
-            }
-            
-            response = requests.post(upload_url, headers=headers, data=file_data)
-            
-            if response.status_code != 200:
-                raise Exception(f"File upload failed: {response.status_code}, {response.text}")
-            
-            file_info = response.json()
-            file_uri = file_info.get("file", {}).get("uri")
-            
-            if not file_uri:
-                raise Exception("Failed to get file URI")
-            
-            # Step 3: Generate content using the file
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GOOGLE_API_KEY}"
-            
-            headers = {'Content-Type': 'application/json'}
-            
-            payload = {
-                "contents": [{
-                    "parts":[
-                        {"text": "Transcribe this audio clip accurately"},
-                        {"file_data": {"mime_type": mime_type, "file_uri": file_uri}}
-                    ]
-                }]
-            }
-            
-            response = requests.post(url, headers=headers, json=payload)
-            
-            if response.status_code != 200:
-                raise Exception(f"Transcription failed: {response.status_code}, {response.text}")
-            
-            # Extract the transcription from the response
-            result = response.json()
-            if "candidates" in result and len(result["candidates"]) > 0:
-                parts = result["candidates"][0]["content"]["parts"]
-                transcription = " ".join([part.get("text", "") for part in parts if "text" in part])
-                return transcription
-            else:
-                raise Exception("No transcription found in the response")
-            
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-                
+        file_uri = upload_file_to_gemini(file.stream, mime_type, filename or 'audio')
+        return _generate_from_file_part(
+            "Transcribe this audio clip accurately",
+            {"file_data": {"mime_type": mime_type, "file_uri": file_uri}}
+        )
+    
     except Exception as e:
         logger.error(f"Error transcribing audio: {str(e)}")
         return f"Failed to transcribe audio: {str(e)}"
@@ -217,75 +225,33 @@ def extract_text_from_image(file):
     """
     Extract text from an image using Gemini Vision.
     
+    Small images are sent inline; images over GEMINI_INLINE_MAX_BYTES are
+    streamed to the Gemini Files API instead, avoiding a base64 copy of the
+    whole image in memory.
+    
     Args:
         file: The image file object
         
     Returns:
         str: The extracted text
     """
-    import os
-    import tempfile
-    import base64
-    import requests
-    import json
-    from config import GOOGLE_API_KEY
-    
     try:
-        # Save the file temporarily
         filename = secure_filename(file.filename)
+        mime_type = mimetypes.guess_type(filename)[0] or 'image/jpeg'
         
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as temp_file:
-            file.save(temp_file.name)
-            image_path = temp_file.name
-        
-        try:
-            # Get MIME type
-            import mimetypes
-            mime_type = mimetypes.guess_type(filename)[0] or 'image/jpeg'
-            
-            # Read the file and encode as base64
-            with open(image_path, "rb") as img_file:
-                base64_image = base64.b64encode(img_file.read()).decode("utf-8")
-            
-            # Call Gemini API
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GOOGLE_API_KEY}"
-            
-            headers = {'Content-Type': 'application/json'}
-            
-            payload = {
-                "contents": [{
-                    "parts":[
-                        {"text": "Extract and transcribe all visible text from this image"},
-                        {
-                            "inline_data": {
-                                "mime_type": mime_type,
-                                "data": base64_image
-                            }
-                        }
-                    ]
-                }]
+        if _stream_size(file.stream) > GEMINI_INLINE_MAX_BYTES:
+            file_uri = upload_file_to_gemini(file.stream, mime_type, filename or 'image')
+            file_part = {"file_data": {"mime_type": mime_type, "file_uri": file_uri}}
+        else:
+            file_part = {
+                "inline_data": {
+                    "mime_type": mime_type,
+                    "data": base64.b64encode(file.stream.read()).decode('ascii')
+                }
             }
-            
-            response = requests.post(url, headers=headers, json=payload)
-            
-            if response.status_code != 200:
-                raise Exception(f"Image text extraction failed: {response.status_code}, {response.text}")
-            
-            # Extract the extracted text from the response
-            result = response.json()
-            if "candidates" in result and len(result["candidates"]) > 0:
-                parts = result["candidates"][0]["content"]["parts"]
-                extracted_text = " ".join([part.get("text", "") for part in parts if "text" in part])
-                return extracted_text
-            else:
-                raise Exception("No text extraction found in the response")
-            
-        finally:
-            # Clean up the temporary file
-            if os.path.exists(image_path):
-                os.remove(image_path)
-                
+        
+        return _generate_from_file_part("Extract and transcribe all visible text from this image", file_part)
+    
     except Exception as e:
         logger.error(f"Error extracting text from image: {str(e)}")
         return f"Failed to extract text from image: {str(e)}"
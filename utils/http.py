@@ -0,0 +1,75 @@
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE
+)
+from utils.shared import ProcessWide
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+class TimeoutSession(requests.Session):
+    """A requests Session that applies a default (connect, read) timeout to every request."""
+
+    def __init__(self, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+def create_transport(max_retries=HTTP_MAX_RETRIES, backoff_factor=HTTP_BACKOFF_FACTOR,
+                     pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE):
+    """
+    Create the default transport: a pooled, keep-alive adapter that retries
+    connection failures and 429 and 5xx responses with exponential backoff
+    (honoring Retry-After).
+    
+    Read errors are never retried: a timed-out request may still have been
+    processed, and repeating a Gemini generation or an upload chunk would
+    bill or send it twice.
+    """
+    retry = Retry(
+        total=max_retries,
+        read=0,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=None,  # Retry POSTs too, but only when they were refused or rejected
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    return HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+
+def create_session(transport=None, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)):
+    """
+    Create an outbound HTTP session.
+
+    Args:
+        transport (requests.adapters.BaseAdapter, optional): Adapter mounted for
+            http:// and https://. Defaults to create_transport(); tests can pass
+            a stub adapter instead.
+        timeout (tuple, optional): Default (connect, read) timeout in seconds
+
+    Returns:
+        TimeoutSession: The configured session
+    """
+    session = TimeoutSession(timeout=timeout)
+    transport = transport if transport is not None else create_transport()
+    session.mount('http://', transport)
+    session.mount('https://', transport)
+    return session
+
+_session = ProcessWide(create_session)
+
+def get_session():
+    """Return the process-wide outbound HTTP session, creating it on first use."""
+    return _session.get()
+
+def set_session(session):
+    """Replace the process-wide outbound HTTP session (e.g. with one using a stub transport)."""
+    _session.set(session)
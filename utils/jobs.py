@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import JOB_DB_PATH, JOB_WORKERS, JOB_RETENTION
+from utils.shared import open_sqlite
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+def _process_alive(pid):
+    """Return True if a process with the given PID is still running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobQueue:
+    """
+    Background job queue backed by a local worker pool and a persistent job table.
+
+    Jobs run in this process's thread pool, while their status, progress and
+    result live in SQLite so that any gunicorn worker can answer a status
+    poll. Jobs whose owning process died are marked failed on startup.
+    """
+
+    def __init__(self, db_path=JOB_DB_PATH, workers=JOB_WORKERS, retention=JOB_RETENTION):
+        self.db_path = db_path
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._connection = open_sqlite(
+            db_path,
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+            "progress REAL NOT NULL DEFAULT 0, message TEXT, result TEXT, error TEXT, "
+            "worker_pid INTEGER, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jobs')
+        self._fail_orphaned_jobs()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+            self._connection.commit()
+            return cursor
+
+    def _fail_orphaned_jobs(self):
+        """Mark jobs left unfinished by processes that no longer exist as failed."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, worker_pid FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchall()
+        for job_id, worker_pid in rows:
+            if worker_pid is None or not _process_alive(worker_pid):
+                self._update(job_id, status=FAILED, error="Job was interrupted by a server restart")
+                logger.warning(f"Marked interrupted job {job_id} as failed")
+
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def submit(self, kind, func, *args, **kwargs):
+        """
+        Enqueue a job and return its ID.
+
+        func is called as func(report_progress, *args, **kwargs), where
+        report_progress(fraction, message=None) records progress between 0 and 1.
+        Its return value must be JSON-serializable and becomes the job result.
+        """
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self._execute(
+            "INSERT INTO jobs (id, kind, status, progress, worker_pid, created_at, updated_at) "
+            "VALUES (?, ?, ?, 0, ?, ?, ?)",
+            (job_id, kind, QUEUED, os.getpid(), now, now)
+        )
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        self._purge_expired(now)
+        logger.info(f"Enqueued {kind} job {job_id}")
+        return job_id
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, status=RUNNING)
+
+        def report_progress(fraction, message=None):
+            self._update(job_id, progress=max(0.0, min(1.0, fraction)), message=message)
+
+        try:
+            result = func(report_progress, *args, **kwargs)
+            self._update(job_id, status=SUCCEEDED, progress=1.0, result=json.dumps(result))
+            logger.info(f"Job {job_id} succeeded")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self._update(job_id, status=FAILED, error=str(e))
+
+    def get(self, job_id):
+        """Return a job's status as a dictionary, or None if it doesn't exist."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, kind, status, progress, message, result, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "progress": row[3],
+            "message": row[4],
+            "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+            "created_at": row[7],
+            "updated_at": row[8],
+        }
+
+    def _purge_expired(self, now):
+        """Delete finished jobs older than the retention period."""
+        self._execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (SUCCEEDED, FAILED, now - self.retention)
+        )
@@ -0,0 +1,107 @@
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from cached lookups up to slow model calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(pairs):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}' if pairs else ''
+
+class Histogram:
+    """
+    Thread-safe Prometheus-style histogram with labels.
+
+    Observations are counted in cumulative buckets per label combination and
+    rendered in the Prometheus text exposition format by render().
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record one observation (in seconds) for the given label values."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0}
+            series["counts"][index] += 1
+            series["sum"] += value
+
+    def render(self):
+        """Return the histogram in the Prometheus text exposition format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(value["counts"]), value["sum"]) for key, value in self._series.items())
+        for key, counts, total in series:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(pairs)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(pairs)} {cumulative}")
+        return '\n'.join(lines)
+
+STAGE_SECONDS = Histogram(
+    'rag_stage_duration_seconds', 'Time spent in each chat, extraction and ingest stage.', ('stage',)
+)
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by endpoint.', ('method', 'endpoint', 'status')
+)
+_histograms = (STAGE_SECONDS, REQUEST_SECONDS)
+
+# Per-request collector of stage durations, set by collect_timings()
+_timings = contextvars.ContextVar('timings', default=None)
+_timings_lock = threading.Lock()
+
+@contextmanager
+def span(stage):
+    """
+    Time a block (or, used as a decorator, each call) as one stage.
+
+    The duration is observed in STAGE_SECONDS and, inside collect_timings(),
+    added to the collected timings.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _timings.get()
+        if timings is not None:
+            with _timings_lock:
+                timings[stage] = timings.get(stage, 0.0) + elapsed * 1000
+
+@contextmanager
+def collect_timings():
+    """
+    Collect the spans recorded within the block into a dict of milliseconds by stage.
+
+    Spans run in other threads are included when the work is submitted with
+    a copy of the current context (see utils.retrieval.fan_out).
+    """
+    timings = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+def render_metrics():
+    """Return all metrics of this process in the Prometheus text exposition format."""
+    return '\n'.join(histogram.render() for histogram in _histograms) + '\n'
@@ -0,0 +1,173 @@
+import io
+import time
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import PyPDF2
+from config import PDF_MAX_PAGES, PDF_TIME_BUDGET, PDF_WORKERS, PDF_PAGES_PER_TASK, PDF_PARALLEL_MIN_PAGES
+from utils.shared import ProcessWide
+
+logger = logging.getLogger(__name__)
+
+class SharedPdfStream(io.RawIOBase):
+    """A read-only file over a PDF in shared memory, so workers parse it without copying it."""
+
+    def __init__(self, name, size):
+        self._memory = shared_memory.SharedMemory(name=name)
+        self._view = self._memory.buf[:size]
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(base + offset, 0)
+        return self._position
+
+    def readinto(self, buffer):
+        data = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            self._memory.close()
+        super().close()
+
+# The PDF a worker process last opened, as (shared memory name, stream, reader),
+# so the ranges of one PDF are parsed once per worker
+_worker_pdf = None
+
+def _page_text(reader, page_number):
+    try:
+        return reader.pages[page_number].extract_text() or ''
+    except Exception as e:
+        logger.warning(f"Error extracting text from PDF page {page_number + 1}: {str(e)}")
+        return ''
+
+def _shared_reader(name, size):
+    global _worker_pdf
+    if _worker_pdf is None or _worker_pdf[0] != name:
+        if _worker_pdf is not None:
+            _worker_pdf[1].close()
+            _worker_pdf = None
+        stream = io.BufferedReader(SharedPdfStream(name, size))
+        _worker_pdf = (name, stream, PyPDF2.PdfReader(stream))
+    return _worker_pdf[2]
+
+def _extract_range(name, size, start, end):
+    """Worker task: return the text of pages start..end-1 of the PDF in shared memory block name."""
+    reader = _shared_reader(name, size)
+    return [_page_text(reader, page_number) for page_number in range(start, end)]
+
+def worker_pool_context():
+    """Return the multiprocessing context for worker process pools started by the app."""
+    # The app runs request and job threads, which are unsafe to fork; the
+    # forkserver starts workers from a clean single-threaded process instead
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+def create_pdf_pool(workers=PDF_WORKERS):
+    """Create the pool of PDF extraction processes, or return None when PDFs are extracted inline."""
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers, mp_context=worker_pool_context())
+
+_pool = ProcessWide(create_pdf_pool)
+
+def get_pdf_pool():
+    """Return the process-wide PDF extraction pool, starting it on first use."""
+    return _pool.get()
+
+def _iter_pages_inline(reader, start, limit, deadline, time_budget):
+    for page_number in range(start, limit):
+        if time.monotonic() > deadline:
+            logger.warning(f"PDF extraction stopped at page {page_number} of {limit} after {time_budget}s")
+            return
+        yield _page_text(reader, page_number)
+
+def iter_pdf_pages(data, max_pages=PDF_MAX_PAGES, time_budget=PDF_TIME_BUDGET, pool=None,
+                   pages_per_task=PDF_PAGES_PER_TASK, parallel_min_pages=PDF_PARALLEL_MIN_PAGES):
+    """
+    Extract the text of a PDF page by page, in order, from bytes in memory.
+
+    PDFs with at least parallel_min_pages pages are split into page ranges of
+    pages_per_task pages that a pool of worker processes extract in parallel;
+    smaller ones are extracted in this process. The workers are started once
+    per process and read the PDF from shared memory rather than each getting
+    a copy. Extraction stops after max_pages pages or time_budget seconds,
+    whichever comes first.
+
+    Args:
+        data (bytes): The PDF file contents
+        max_pages (int, optional): Maximum number of pages to extract
+        time_budget (float, optional): Maximum seconds to spend extracting
+        pool (ProcessPoolExecutor, optional): Worker pool; defaults to the
+            process-wide pool of PDF_WORKERS processes
+        pages_per_task (int, optional): Pages extracted per worker task
+        parallel_min_pages (int, optional): Page count from which to use workers
+
+    Yields:
+        str: The text of each page
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    limit = min(page_count, max_pages)
+    if limit < page_count:
+        logger.warning(f"PDF has {page_count} pages; extracting only the first {limit}")
+    deadline = time.monotonic() + time_budget
+
+    shared_pool = pool is None
+    if limit >= parallel_min_pages and shared_pool:
+        pool = get_pdf_pool()
+    if limit < parallel_min_pages or pool is None:
+        yield from _iter_pages_inline(reader, 0, limit, deadline, time_budget)
+        return
+
+    memory = shared_memory.SharedMemory(create=True, size=len(data))
+    futures = []
+    next_page = 0
+    try:
+        memory.buf[:len(data)] = data
+        try:
+            futures = [
+                pool.submit(_extract_range, memory.name, len(data), start, min(start + pages_per_task, limit))
+                for start in range(0, limit, pages_per_task)
+            ]
+            # Yield ranges in page order as soon as each one (and its predecessors) is done
+            for future in futures:
+                remaining = deadline - time.monotonic()
+                try:
+                    pages = future.result(timeout=max(remaining, 0))
+                except FutureTimeoutError:
+                    logger.warning(f"PDF extraction stopped at page {next_page} of {limit} after {time_budget}s")
+                    return
+                yield from pages
+                next_page += len(pages)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool and finish here
+            logger.warning(f"PDF worker pool failed at page {next_page}; continuing inline")
+            if shared_pool:
+                _pool.reset()
+            yield from _iter_pages_inline(reader, next_page, limit, deadline, time_budget)
+    finally:
+        # Don't run ranges that are no longer wanted
+        for future in futures:
+            future.cancel()
+        memory.close()
+        memory.unlink()
+
+def extract_pdf_text(data, **kwargs):
+    """Return the text of a PDF (bytes in memory), one line break between pages."""
+    return '\n'.join(iter_pdf_pages(data, **kwargs))
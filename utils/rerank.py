@@ -0,0 +1,134 @@
+import re
+import time
+import logging
+from config import RERANK_PROVIDER, RERANK_MODEL_NAME, RERANK_TOP_K, RERANK_TOKEN_BUDGET
+from utils.chunking import estimate_tokens
+from utils.shared import LazyModel, ProcessWide
+
+logger = logging.getLogger(__name__)
+
+class Reranker:
+    """
+    Base class for rerankers.
+
+    A reranker scores (query, passage) pairs jointly, which is more accurate
+    than comparing independently computed embeddings but too slow to run over
+    the whole collection, so it is applied to a small over-fetched candidate set.
+    """
+    model_name = None
+
+    def score(self, query_text, passages):
+        """
+        Score passages for relevance to a query.
+
+        Args:
+            query_text (str): The query
+            passages (list): The passage texts
+
+        Returns:
+            list: One float per passage; higher is more relevant
+        """
+        raise NotImplementedError
+
+    def warmup(self):
+        """Load any underlying model ahead of the first request."""
+        pass
+
+class FastEmbedReranker(Reranker):
+    """CPU cross-encoder reranker from fastembed, loading the ONNX model once per process."""
+
+    def __init__(self, model_name=RERANK_MODEL_NAME):
+        self.model_name = model_name
+        self._model = LazyModel(self._load_model, f"reranking model {model_name}")
+
+    def _load_model(self):
+        from fastembed.rerank.cross_encoder import TextCrossEncoder
+        return TextCrossEncoder(model_name=self.model_name)
+
+    def score(self, query_text, passages):
+        return [float(score) for score in self._model.get().rerank(query_text, list(passages))]
+
+    def warmup(self):
+        self._model.get()
+
+class OverlapReranker(Reranker):
+    """
+    Deterministic local reranker.
+
+    Scores passages by the fraction of distinct query terms they contain,
+    without a model download; useful offline and for benchmarking the
+    reranking stage itself.
+    """
+    model_name = "local-term-overlap"
+
+    def score(self, query_text, passages):
+        query_terms = set(re.findall(r'\w+', query_text.lower()))
+        if not query_terms:
+            return [0.0] * len(passages)
+        return [
+            len(query_terms & set(re.findall(r'\w+', passage.lower()))) / len(query_terms)
+            for passage in passages
+        ]
+
+_RERANKERS = {
+    'fastembed': FastEmbedReranker,
+    'overlap': OverlapReranker,
+}
+
+def create_reranker(name=RERANK_PROVIDER):
+    """Create a new reranker by its registered name, or None for 'none'."""
+    if name == 'none':
+        return None
+    try:
+        return _RERANKERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown reranker: {name}")
+
+_reranker = ProcessWide(create_reranker)
+
+def get_reranker():
+    """Return the process-wide reranker (None if reranking is disabled)."""
+    return _reranker.get()
+
+def set_reranker(reranker):
+    """Replace the process-wide reranker."""
+    _reranker.set(reranker)
+
+def rerank(reranker, query_text, passages, top_k=RERANK_TOP_K, token_budget=RERANK_TOKEN_BUDGET):
+    """
+    Rerank candidate passages and keep the best ones that fit a token budget.
+
+    Passages are taken best first until top_k are kept; a passage that would
+    exceed the remaining budget is skipped in favor of shorter, lower-ranked
+    ones. The best passage is always kept so a single long chunk still
+    produces context.
+
+    Args:
+        reranker (Reranker): The reranker to score with
+        query_text (str): The query
+        passages (list): Candidate passage texts, in retrieval order
+        top_k (int, optional): Maximum passages to keep
+        token_budget (int, optional): Maximum estimated tokens across kept passages
+
+    Returns:
+        tuple: (kept passages best first, scores of the kept passages, rerank time in ms)
+    """
+    if not passages:
+        return [], [], 0.0
+    start = time.perf_counter()
+    scores = reranker.score(query_text, passages)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    # Stable sort keeps retrieval order among equally scored passages
+    ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+    kept = []
+    used_tokens = 0
+    for i in ranked:
+        if len(kept) >= top_k:
+            break
+        tokens = estimate_tokens(passages[i])
+        if kept and used_tokens + tokens > token_budget:
+            continue
+        kept.append(i)
+        used_tokens += tokens
+    return [passages[i] for i in kept], [scores[i] for i in kept], elapsed_ms
@@ -0,0 +1,105 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+class SemanticResponseCache:
+    """
+    Cache of chat responses matched by query-embedding similarity.
+
+    An entry is reused when its query embedding has a cosine similarity of at
+    least `threshold` with the new query and it was produced with the same
+    retrieval flags against the same collection revision. Entries from older
+    revisions are dropped as soon as a newer revision is seen.
+    """
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL, threshold=RESPONSE_CACHE_THRESHOLD):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries = OrderedDict()
+        self._next_id = 0
+        self._revision = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _sync_revision(self, revision):
+        """Drop every entry when the collection revision moves on."""
+        if revision is not None and revision != self._revision:
+            if self._revision is not None and self._entries:
+                logger.debug(f"Collection revision changed to {revision}, clearing {len(self._entries)} cached responses")
+            self._entries.clear()
+            self._revision = revision
+
+    def get(self, query_vector, flags, revision):
+        """
+        Look up a cached response for a query.
+
+        Args:
+            query_vector (list): The query embedding
+            flags (tuple): Retrieval flags the response must have been produced with
+            revision (int): The current collection revision
+
+        Returns:
+            dict: The cached response (with 'similarity' added), or None
+        """
+        query = self._normalize(query_vector)
+        now = time.monotonic()
+        with self._lock:
+            self._sync_revision(revision)
+            best_id, best_similarity = None, self.threshold
+            for entry_id, entry in list(self._entries.items()):
+                if entry['expires_at'] <= now:
+                    del self._entries[entry_id]
+                    continue
+                if entry['flags'] != flags:
+                    continue
+                similarity = float(np.dot(entry['vector'], query))
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return dict(self._entries[best_id]['response'], similarity=best_similarity)
+
+    def set(self, query_vector, flags, revision, response):
+        """Cache a response produced for query_vector with the given flags at revision."""
+        with self._lock:
+            self._sync_revision(revision)
+            self._entries[self._next_id] = {
+                'vector': self._normalize(query_vector),
+                'flags': flags,
+                'response': response,
+                'expires_at': time.monotonic() + self.ttl,
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached responses."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,51 @@
+import time
+import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from config import RETRIEVAL_MAX_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Shared pool for retrieval lookups; sized so slow sources can't starve the others
+_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_MAX_WORKERS, thread_name_prefix='retrieval')
+
+def fan_out(sources):
+    """
+    Run several retrieval lookups concurrently, each with its own timeout.
+
+    A source that raises or misses its deadline contributes an empty list,
+    so the caller always gets a (possibly partial) result for every source.
+    Total latency is bounded by the slowest source's timeout rather than the
+    sum of all sources.
+
+    Args:
+        sources (dict): Maps a source name to a (callable, timeout_seconds) tuple
+
+    Returns:
+        tuple: (results, failures) where results maps each source name to its
+               list of results and failures maps failed source names to a reason
+    """
+    start = time.monotonic()
+    # Run each lookup in a copy of this context so its timing spans reach the caller
+    futures = {
+        name: (_executor.submit(contextvars.copy_context().run, func), timeout)
+        for name, (func, timeout) in sources.items()
+    }
+
+    results = {}
+    failures = {}
+    for name, (future, timeout) in futures.items():
+        remaining = max(0.0, timeout - (time.monotonic() - start))
+        try:
+            results[name] = future.result(timeout=remaining)
+        except TimeoutError:
+            future.cancel()
+            logger.warning(f"Retrieval source '{name}' timed out after {timeout}s")
+            results[name] = []
+            failures[name] = "timeout"
+        except Exception as e:
+            logger.error(f"Retrieval source '{name}' failed: {str(e)}")
+            results[name] = []
+            failures[name] = str(e)
+
+    return results, failures
@@ -1,18 +1,20 @@
 import logging
-import requests
-from config import SERPER_API_KEY
+from config import SERPER_API_KEY, SERPER_API_URL
+from utils.http import get_session
+from utils.metrics import span
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-def search_web(query, num_results=3):
+def search_web(query, num_results=3, raise_errors=False):
     """
     Search the web using Serper API.
     
     Args:
         query (str): The search query
         num_results (int, optional): Number of results to return. Defaults to 3.
+        raise_errors (bool, optional): Raise on failure instead of returning
+            the error as a result, so callers such as /api/chat can report
+            the source as failed. Defaults to False.
     
     Returns:
         list: List of search results as formatted strings
@@ -28,10 +30,13 @@ def search_web(query, num_results=3):
             'num': num_results
         }
         
-        response = requests.post('https://google.serper.dev/search', headers=headers, json=payload)
+        with span('web_search'):
+            response = get_session().post(SERPER_API_URL, headers=headers, json=payload)
         
         if response.status_code != 200:
             logger.error(f"Error from Serper API: {response.status_code} {response.text}")
+            if raise_errors:
+                raise RuntimeError(f"Search failed with status code {response.status_code}")
             return [f"Search failed with status code {response.status_code}"]
         
         results = response.json()
@@ -63,4 +68,6 @@ def search_web(query, num_results=3):
     
     except Exception as e:
         logger.error(f"Error during web search: {str(e)}")
+        if raise_errors:
+            raise
         return [f"Search failed with error: {str(e)}"]
\ No newline at end of file
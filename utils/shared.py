@@ -0,0 +1,71 @@
+import logging
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+_UNSET = object()
+
+class ProcessWide:
+    """
+    A process-wide instance, created by factory() on first use.
+
+    The value may legitimately be None (e.g. a disabled cache); set() replaces
+    it, for instance with a test stand-in.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = _UNSET
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._value is _UNSET:
+            with self._lock:
+                # Another thread may have created it while we waited for the lock
+                if self._value is _UNSET:
+                    self._value = self._factory()
+        return self._value
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+    def reset(self):
+        """Forget the instance, so the next get() creates a new one."""
+        with self._lock:
+            self._value = _UNSET
+
+class LazyModel:
+    """A model loaded by load() on first use, once per process, even with concurrent callers."""
+
+    def __init__(self, load, description):
+        self._load = load
+        self.description = description
+        self._model = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the loaded model, loading it on first use."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"Loading {self.description}")
+                    self._model = self._load()
+        return self._model
+
+def open_sqlite(path, *schema, timeout=5, isolation_level=''):
+    """
+    Open a SQLite database shared by this process's threads and other workers.
+
+    The connection may be used from any thread (callers serialize access with
+    their own lock) and the database uses WAL, so readers in other processes
+    don't block the writer. The schema statements are run once on opening.
+    Pass isolation_level=None to manage transactions explicitly.
+    """
+    connection = sqlite3.connect(path, check_same_thread=False, timeout=timeout, isolation_level=isolation_level)
+    connection.execute("PRAGMA journal_mode=WAL")
+    for statement in schema:
+        connection.execute(statement)
+    connection.commit()
+    return connection
@@ -0,0 +1,106 @@
+import logging
+import threading
+from config import STATS_DB_PATH
+from utils.shared import open_sqlite
+
+logger = logging.getLogger(__name__)
+
+class CollectionStatsStore:
+    """
+    Incrementally maintained size statistics for a collection.
+
+    Keeps the total size and per-source-type counts in SQLite, updated as
+    documents are added and deleted, so reading them is O(1) regardless of
+    collection size. collection_name is the key the counters are stored
+    under; QdrantService qualifies it with the Qdrant location.
+
+    The counters only see writes made through this database, so another host
+    writing to the same collection makes them drift until rebuilt; exact
+    document counts come from Qdrant instead (QdrantService.count_documents).
+    """
+
+    def __init__(self, collection_name, db_path=STATS_DB_PATH):
+        self.collection_name = collection_name
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection = open_sqlite(
+            db_path,
+            "CREATE TABLE IF NOT EXISTS collection_stats ("
+            "collection TEXT NOT NULL, key TEXT NOT NULL, value INTEGER NOT NULL, "
+            "PRIMARY KEY (collection, key))"
+        )
+
+    def _add(self, deltas):
+        """Apply counter deltas in a single transaction."""
+        with self._lock:
+            self._connection.executemany(
+                "INSERT INTO collection_stats (collection, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (collection, key) DO UPDATE SET value = value + excluded.value",
+                [(self.collection_name, key, delta) for key, delta in deltas.items()]
+            )
+            self._connection.commit()
+
+    @staticmethod
+    def _deltas(documents, sign):
+        deltas = {'total_size': 0}
+        for metadata in documents:
+            source_type = metadata.get('source_type') or 'unknown'
+            deltas['total_size'] += sign * int(metadata.get('size') or 0)
+            key = f"source_type:{source_type}"
+            deltas[key] = deltas.get(key, 0) + sign
+        return deltas
+
+    def record_added(self, documents):
+        """Record added documents, given their metadata dictionaries ('size', 'source_type')."""
+        if documents:
+            self._add(self._deltas(documents, 1))
+
+    def record_deleted(self, documents):
+        """Record deleted documents, given their metadata dictionaries ('size', 'source_type')."""
+        if documents:
+            self._add(self._deltas(documents, -1))
+
+    def is_initialized(self):
+        """Return True once the counters have been built for this collection."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM collection_stats WHERE collection = ? AND key = 'initialized'",
+                (self.collection_name,)
+            ).fetchone()
+        return row is not None
+
+    def reset(self, documents=()):
+        """Replace all counters with those computed from the given document metadata."""
+        deltas = self._deltas(documents, 1)
+        deltas['initialized'] = 1
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM collection_stats WHERE collection = ?", (self.collection_name,)
+            )
+            self._connection.executemany(
+                "INSERT INTO collection_stats (collection, key, value) VALUES (?, ?, ?)",
+                [(self.collection_name, key, value) for key, value in deltas.items()]
+            )
+            self._connection.commit()
+
+    def get(self):
+        """
+        Return the current statistics.
+
+        Returns:
+            dict: 'total_size' and 'source_types' (counts by source type)
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, value FROM collection_stats WHERE collection = ?", (self.collection_name,)
+            ).fetchall()
+        values = dict(rows)
+        source_types = {
+            key[len('source_type:'):]: value
+            for key, value in values.items()
+            if key.startswith('source_type:') and value > 0
+        }
+        return {
+            "total_size": max(values.get('total_size', 0), 0),
+            "source_types": source_types,
+        }
@@ -0,0 +1,108 @@
+import re
+import time
+import queue
+import logging
+import threading
+from config import TITLE_BATCH_SIZE, TITLE_BATCH_DELAY
+from utils.ai import generate_titles_for_contents
+
+logger = logging.getLogger(__name__)
+
+# Where a document's title came from, stored as its 'title_source' payload
+TITLE_SOURCE_USER = 'user'
+TITLE_SOURCE_HEURISTIC = 'heuristic'
+TITLE_SOURCE_GENERATED = 'generated'
+
+# Placeholder used when no title can be derived; never treated as a real title
+UNTITLED = "Untitled Document"
+
+_MAX_TITLE_WORDS = 10
+_MAX_TITLE_LENGTH = 80
+
+def heuristic_title(text):
+    """
+    Derive a title from the text itself, without any model call.
+
+    Uses the first non-empty line when it is short enough to be a heading,
+    otherwise the opening words of the first sentence.
+    """
+    for line in text.splitlines():
+        line = re.sub(r'^[#>*\-\s]+', '', line).strip()
+        if line:
+            break
+    else:
+        return UNTITLED
+
+    if len(line) <= _MAX_TITLE_LENGTH and len(line.split()) <= _MAX_TITLE_WORDS + 2:
+        return line.rstrip('.:;,')
+
+    sentence = re.split(r'(?<=[.!?])\s', line, maxsplit=1)[0].rstrip('.:;,')
+    title = ' '.join(sentence.split()[:_MAX_TITLE_WORDS])
+    if len(title) > _MAX_TITLE_LENGTH:
+        title = title[:_MAX_TITLE_LENGTH].rsplit(' ', 1)[0]
+    title = title.rstrip('.:;,')
+    return title if title == sentence else title + "..."
+
+class TitleUpgrader:
+    """
+    Background worker that replaces heuristic titles with Gemini-generated ones.
+
+    Documents are queued as they are stored and titled in batches of up to
+    batch_size per Gemini request, waiting up to batch_delay seconds for a
+    batch to fill. apply(doc_id, title) is called for each generated title.
+    Pending work is kept in memory only; documents still carrying heuristic
+    titles after a restart can be queued again.
+    """
+
+    def __init__(self, apply, batch_size=TITLE_BATCH_SIZE, batch_delay=TITLE_BATCH_DELAY):
+        self.apply = apply
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='title-upgrader', daemon=True)
+        self._thread.start()
+
+    def submit(self, doc_id, text):
+        """Queue a document for a generated title."""
+        self._queue.put((doc_id, text[:300]))
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_delay
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def join(self):
+        """Block until every queued document has been processed."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                self._process(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _process(self, batch):
+        try:
+            titles = generate_titles_for_contents([text for _, text in batch])
+        except Exception as e:
+            logger.warning(f"Error generating titles for {len(batch)} documents: {str(e)}")
+            return
+        for (doc_id, _), title in zip(batch, titles):
+            if not title:
+                continue
+            try:
+                self.apply(doc_id, title)
+            except Exception as e:
+                logger.warning(f"Error updating title of document {doc_id}: {str(e)}")
+        logger.info(f"Generated titles for {len(batch)} documents in one request")